@@ -0,0 +1,87 @@
+from threading import Lock
+from time import perf_counter_ns
+from typing import Callable, List, Optional, Set, Tuple
+
+from inputDevice.input_event import InputPayload, InputSource
+from outputDevice.output_handler import OutputHandler
+
+class NullOutputHandler(OutputHandler):
+    """
+    Headless OutputHandler that accepts every source and drops every payload,
+    only counting them. Lets the replay loop be measured without pynput or a
+    display.
+    """
+
+    def __init__(self):
+        self.__lock = Lock()
+        self.__count = 0
+        self.__first_ns: Optional[int] = None
+        self.__last_ns: Optional[int] = None
+        self.__target: Optional[int] = None
+        self.__on_target: Optional[Callable[[], None]] = None
+
+    def get_supported_sources(self) -> Set[InputSource]:
+        return set(InputSource)
+
+    def expect(self, count: int, callback: Callable[[], None]):
+        """
+        Call a function, on the replay thread, once count payloads were handled.
+        """
+        with self.__lock:
+            self.__target = count
+            self.__on_target = callback
+
+    def handle_event(self, payload: InputPayload):
+        now = perf_counter_ns()
+        with self.__lock:
+            if self.__first_ns is None:
+                self.__first_ns = now
+            self.__last_ns = now
+            self.__count += 1
+            reached = self.__count == self.__target
+
+        self._record(now, payload)
+
+        if reached:
+            self.__on_target()
+
+    def _record(self, time_ns: int, payload: InputPayload):
+        """
+        Hook called for every handled payload.
+        """
+        pass
+
+    def get_count(self) -> int:
+        with self.__lock:
+            return self.__count
+
+    def get_first_ns(self) -> Optional[int]:
+        """
+        Get the perf_counter_ns time the first payload was handled at.
+        """
+        with self.__lock:
+            return self.__first_ns
+
+    def get_last_ns(self) -> Optional[int]:
+        """
+        Get the perf_counter_ns time the last payload was handled at.
+        """
+        with self.__lock:
+            return self.__last_ns
+
+
+class RecordingOutputHandler(NullOutputHandler):
+    """
+    Headless OutputHandler that keeps every handled payload along with the
+    perf_counter_ns time it was handled at.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.__handled: List[Tuple[int, InputPayload]] = []
+
+    def _record(self, time_ns: int, payload: InputPayload):
+        self.__handled.append((time_ns, payload))
+
+    def get_handled(self) -> List[Tuple[int, InputPayload]]:
+        return list(self.__handled)
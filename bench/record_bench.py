@@ -0,0 +1,270 @@
+"""
+Recording benchmark: drives InputRecorder and Serialize with synthetic
+InputSources emitting event storms and reports callback latency, dropped
+events, hand-over and group commit write times, serializer lock hold
+times, bytes written and peak RSS for each scenario as JSON lines.
+
+Usage:
+    python -m bench.record_bench [--scale 0.1] [--ring_capacity 4096] [--durability batch] [--output results.jsonl]
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from threading import Condition, Lock, get_ident
+from typing import Callable, List, Optional
+
+from bench import synthetic
+from bench.replay_bench import peak_rss_bytes
+from bench.synthetic_source import SyntheticSource
+from inputDevice.flush_policy import FlushPolicy
+from inputDevice.input_recorder import InputRecorder
+from metrics.metrics import Histogram
+from ser.ser import Serialize
+
+class TimedLock:
+    """
+    Lock recording how long it is held, in microseconds, every time it is
+    released. Usable on its own or under a Condition.
+    """
+
+    def __init__(self, held_us: Histogram):
+        self.__lock = Lock()
+        self.__held_us = held_us
+        self.__owner: Optional[int] = None
+        self.__acquired = 0
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        if not self.__lock.acquire(blocking, timeout):
+            return False
+        self.__owner = get_ident()
+        self.__acquired = time.perf_counter_ns()
+        return True
+
+    def release(self):
+        # Recorded before releasing, so only the holder records
+        self.__held_us.record((time.perf_counter_ns() - self.__acquired) / 1_000)
+        self.__owner = None
+        self.__lock.release()
+
+    def _is_owned(self) -> bool:
+        return self.__owner == get_ident()
+
+    def __enter__(self) -> bool:
+        return self.acquire()
+
+    def __exit__(self, *args):
+        self.release()
+
+
+class TimedSerialize(Serialize):
+    """
+    Serialize measuring, in microseconds, how long the recorder takes to
+    hand a batch over, how long the writer takes to write a group commit,
+    and how long the queue lock (behind the condition) and the write lock
+    are held each time.
+    """
+
+    def __init__(self, file: str, **kwargs):
+        super().__init__(file, **kwargs)
+        self.__handover_us = Histogram()
+        self.__write_us = Histogram()
+        self.__queue_lock_us = Histogram()
+        self.__write_lock_us = Histogram()
+
+        # Replaced before the writer thread starts, so nothing holds them yet
+        self._condition = Condition(TimedLock(self.__queue_lock_us))
+        self._write_lock = TimedLock(self.__write_lock_us)
+
+    def schedule_serialization(self, batch, wait: bool = False) -> bool:
+        start = time.perf_counter_ns()
+        queued = super().schedule_serialization(batch, wait)
+        self.__handover_us.record((time.perf_counter_ns() - start) / 1_000)
+        return queued
+
+    def _unsafe_serialize(self, batches):
+        start = time.perf_counter_ns()
+        super()._unsafe_serialize(batches)
+        self.__write_us.record((time.perf_counter_ns() - start) / 1_000)
+
+    def get_handover_us(self) -> Histogram:
+        return self.__handover_us
+
+    def get_write_us(self) -> Histogram:
+        return self.__write_us
+
+    def get_queue_lock_us(self) -> Histogram:
+        return self.__queue_lock_us
+
+    def get_write_lock_us(self) -> Histogram:
+        return self.__write_lock_us
+
+
+class Scenario:
+    """
+    The synthetic sources to record from and how fast they emit.
+
+    Attributes:
+        name (str): Identifier reported in the results.
+        build (Callable[[float], List[SyntheticSource]]): Builds the sources, given the duration scale.
+    """
+
+    def __init__(self, name: str, build: Callable[[float], List[SyntheticSource]]):
+        self.name = name
+        self.build = build
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario("mouse_1khz", lambda scale: [SyntheticSource(synthetic.mouse_moves(1_000, 10 * scale))]),
+    Scenario("key_bursts", lambda scale: [SyntheticSource(synthetic.key_bursts(10 * scale, spacing_us=50))]),
+    Scenario("mixed", lambda scale: [
+        SyntheticSource(synthetic.mouse_moves(1_000, 10 * scale, click_every_s=1)),
+        SyntheticSource(synthetic.key_bursts(10 * scale)),
+    ]),
+    # Every event emitted as fast as possible, to find where the rings overflow
+    Scenario("storm", lambda scale: [
+        SyntheticSource(synthetic.mouse_moves(100_000, 5 * scale), speed=0),
+        SyntheticSource(synthetic.key_bursts(5 * scale, burst_every_s=0.01), speed=0),
+    ]),
+]
+
+
+def run_scenario(scenario: Scenario, scale: float, ring_capacity: int, flush_interval: float,
+                 flush_events: Optional[int], durability: str, directory: str) -> dict:
+    """
+    Record one scenario once and measure it.
+
+    Returns:
+        dict: The measurements, JSON serializable.
+    """
+    sources = scenario.build(scale)
+    path = os.path.join(directory, f"{scenario.name}.evt")
+
+    ser = TimedSerialize(path, durability=Serialize.Durability(durability))
+    recorder = InputRecorder(sources, ser, ring_capacity=ring_capacity,
+                             flush_policy=FlushPolicy(max_events=flush_events, max_latency=flush_interval))
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter_ns()
+
+    recorder.start()
+    for source in sources:
+        source.wait_until_finished()
+    emit_end = time.perf_counter_ns()
+    recorder.stop()
+
+    wall_end = time.perf_counter_ns()
+    cpu_end = time.process_time()
+
+    emitted = sum(source.get_emitted() for source in sources)
+    emit_s = (emit_end - wall_start) / 1_000_000_000
+    wall_s = (wall_end - wall_start) / 1_000_000_000
+    recorded = len(ser.deserialize()) if os.path.exists(path) else 0
+
+    return {
+        "scenario": scenario.name,
+        "ring_capacity": ring_capacity,
+        "flush_interval_s": flush_interval,
+        "flush_events": flush_events,
+        "durability": durability,
+        "emitted": emitted,
+        "recorded": recorded,
+        "dropped": recorder.get_dropped(),
+        "emit_s": round(emit_s, 6),
+        "wall_s": round(wall_s, 6),
+        "events_per_s": round(emitted / emit_s, 1) if emit_s > 0 else None,
+        "callback_ns": [source.get_callback_ns().snapshot() for source in sources],
+        "handover_us": ser.get_handover_us().snapshot(),
+        "write_us": ser.get_write_us().snapshot(),
+        "queue_lock_us": ser.get_queue_lock_us().snapshot(),
+        "write_lock_us": ser.get_write_lock_us().snapshot(),
+        "file_bytes": os.path.getsize(path) if os.path.exists(path) else 0,
+        "cpu_percent": round(100 * (cpu_end - cpu_start) / wall_s, 1) if wall_s > 0 else None,
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Headless recording benchmark for InputRecorder and Serialize",
+        formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=[scenario.name for scenario in SCENARIOS],
+        help="Scenario to run, may be repeated (all by default)."
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1,
+        help="Multiplier applied to the duration of every scenario (e.g. 0.1 for a quick run)."
+    )
+    parser.add_argument(
+        "--ring_capacity",
+        type=int,
+        default=1 << 15,
+        help="Number of events each source can buffer between two drains of the recorder."
+    )
+    parser.add_argument(
+        "--flush_interval",
+        type=float,
+        default=1,
+        help="Longest time an event waits before being handed to the serializer, in seconds."
+    )
+    parser.add_argument(
+        "--flush_events",
+        type=int,
+        default=None,
+        help="Hand a batch to the serializer as soon as it holds this many events (no limit by default)."
+    )
+    parser.add_argument(
+        "--durability",
+        choices=[durability.value for durability in Serialize.Durability],
+        default=Serialize.Durability.NONE.value,
+        help="When the serializer fsyncs what it wrote."
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Append the results to this JSON lines file (stdout by default)."
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    scenarios = [scenario for scenario in SCENARIOS if not args.scenario or scenario.name in args.scenario]
+
+    run = {
+        "bench": "record",
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": args.scale,
+    }
+
+    output = open(args.output, "a") if args.output else sys.stdout
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for scenario in scenarios:
+                result = run_scenario(scenario, args.scale, args.ring_capacity, args.flush_interval,
+                                      args.flush_events, args.durability, directory)
+                output.write(json.dumps({**run, **result}) + "\n")
+                output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
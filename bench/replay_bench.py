@@ -0,0 +1,218 @@
+"""
+Replay benchmark: drives OutputController with synthetic recordings into a
+headless NullOutputHandler and reports throughput, scheduling lateness, CPU
+and memory for each scenario as JSON lines.
+
+Usage:
+    python -m bench.replay_bench [--scale 0.1] [--scheduler both] [--output results.jsonl]
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from threading import Event
+from typing import Callable, Dict, List
+
+from bench import synthetic
+from bench.handlers import NullOutputHandler
+from inputDevice.event_buffer import EventBuffer
+from outputDevice.output_controller import OutputController
+from outputDevice.scheduler import ConditionScheduler, HybridScheduler
+from ser import codec
+from ser.ser import Serialize
+
+class Scenario:
+    """
+    A recording to replay and how to replay it.
+
+    Attributes:
+        name (str): Identifier reported in the results.
+        build (Callable[[float], EventBuffer]): Builds the recording, given the duration scale.
+        speed (float): Replay speed multiplier.
+    """
+
+    def __init__(self, name: str, build: Callable[[float], EventBuffer], speed: float = 1):
+        self.name = name
+        self.build = build
+        self.speed = speed
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario("mouse_1khz", lambda scale: synthetic.mouse_moves(1_000, 10 * scale)),
+    Scenario("key_bursts", lambda scale: synthetic.key_bursts(10 * scale)),
+    Scenario("mixed", lambda scale: synthetic.mixed(500, 10 * scale)),
+    Scenario("hour_long", lambda scale: synthetic.mixed(100, 3_600 * scale), speed=120),
+    Scenario("speed_x4", lambda scale: synthetic.mouse_moves(1_000, 20 * scale), speed=4),
+]
+
+SCHEDULERS: Dict[str, Callable] = {
+    "sleep": ConditionScheduler,
+    "hybrid": HybridScheduler,
+}
+
+
+def peak_rss_bytes() -> int:
+    """
+    Peak resident set size of the process (ru_maxrss is in KiB on Linux).
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_scenario(scenario: Scenario, scheduler: str, scale: float, catch_up: bool, directory: str) -> dict:
+    """
+    Replay one scenario once and measure it.
+
+    Returns:
+        dict: The measurements, JSON serializable. A scenario without any
+        event at this scale is reported as skipped instead.
+    """
+    buffer = scenario.build(scale)
+    if not len(buffer):
+        logging.getLogger("bench.replay_bench").warning(f"Scenario {scenario.name} has no events at scale {scale}, skipping it")
+        return {
+            "scenario": scenario.name,
+            "scheduler": scheduler,
+            "catch_up": catch_up,
+            "speed": scenario.speed,
+            "completed": False,
+            "skipped": "no events",
+            "events": 0,
+        }
+
+    path = os.path.join(directory, f"{scenario.name}.evt")
+    with open(path, "wb") as file:
+        file.write(codec.encode_header() + codec.encode_buffer(buffer))
+
+    handler = NullOutputHandler()
+    controller = OutputController(
+        handlers=[handler],
+        ser=Serialize(path),
+        timeout=0,
+        scheduler=SCHEDULERS[scheduler](),
+        catch_up=catch_up
+    )
+    controller.update_speed(scenario.speed - 1)
+
+    done = Event()
+    captured = {}
+
+    def on_done():
+        # Runs on the replay thread, before the run's histogram is replaced
+        captured["lateness"] = controller.get_lateness()
+        done.set()
+
+    handler.expect(len(buffer), on_done)
+
+    with buffer.get_columns()[0] as timestamps:
+        expected_s = timestamps[-1] / 1_000_000 / scenario.speed
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter_ns()
+
+    controller.start()
+    completed = done.wait(timeout=expected_s * 2 + 30)
+    wall_end = handler.get_last_ns() or time.perf_counter_ns()
+    cpu_end = time.process_time()
+    controller.stop()
+
+    lateness = captured.get("lateness", controller.get_lateness())
+    wall_s = (wall_end - wall_start) / 1_000_000_000
+    first_ns = handler.get_first_ns()
+
+    return {
+        "scenario": scenario.name,
+        "scheduler": scheduler,
+        "catch_up": catch_up,
+        "speed": scenario.speed,
+        "completed": completed,
+        "events": len(buffer),
+        "file_bytes": os.path.getsize(path),
+        "expected_s": round(expected_s, 6),
+        "wall_s": round(wall_s, 6),
+        "events_per_s": round(len(buffer) / wall_s, 1) if wall_s > 0 else None,
+        "time_to_first_event_ms": round((first_ns - wall_start) / 1_000_000, 3) if first_ns else None,
+        "lateness_us": {
+            "mean": round(lateness.get_mean(), 1),
+            "p50": lateness.get_percentile(50),
+            "p99": lateness.get_percentile(99),
+            "max": lateness.get_max(),
+        },
+        "cpu_percent": round(100 * (cpu_end - cpu_start) / wall_s, 1) if wall_s > 0 else None,
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Headless replay benchmark for OutputController",
+        formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=[scenario.name for scenario in SCENARIOS],
+        help="Scenario to run, may be repeated (all by default)."
+    )
+    parser.add_argument(
+        "--scheduler",
+        choices=["sleep", "hybrid", "both"],
+        default="both",
+        help="Replay scheduler to benchmark."
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1,
+        help="Multiplier applied to the duration of every scenario (e.g. 0.1 for a quick run)."
+    )
+    parser.add_argument(
+        "--catch_up",
+        action="store_true",
+        help="Replay with the catch-up mode enabled."
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Append the results to this JSON lines file (stdout by default)."
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    scenarios = [scenario for scenario in SCENARIOS if not args.scenario or scenario.name in args.scenario]
+    schedulers = list(SCHEDULERS) if args.scheduler == "both" else [args.scheduler]
+
+    run = {
+        "bench": "replay",
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": args.scale,
+    }
+
+    output = open(args.output, "a") if args.output else sys.stdout
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for scenario in scenarios:
+                for scheduler in schedulers:
+                    result = run_scenario(scenario, scheduler, args.scale, args.catch_up, directory)
+                    output.write(json.dumps({**run, **result}) + "\n")
+                    output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Synthetic event streams used by the benchmarks, built straight into
+EventBuffers so no device (nor display) is needed.
+"""
+
+import heapq
+from itertools import repeat
+from math import cos, sin, tau
+from operator import itemgetter
+
+from inputDevice.event_buffer import EventBuffer
+from inputDevice.input_event import InputSource
+from keyboard.keyboard_event import KeyboardEvent
+from mouse.mouse_event import MouseEvent
+
+MOUSE = InputSource.MOUSE.value
+KEYBOARD = InputSource.KEYBOARD.value
+MOVE = MouseEvent.EventType.MOVE.value
+PRESSED_LEFT = MouseEvent.EventType.PRESSED_LEFT.value
+RELEASED_LEFT = MouseEvent.EventType.RELEASED_LEFT.value
+PRESSED = KeyboardEvent.EventType.PRESSED.value
+RELEASED = KeyboardEvent.EventType.RELEASED.value
+
+KEYS = [f"char:{char}" for char in "abcdefghijklmnopqrstuvwxyz"] + ["name:space", "name:shift", "name:enter"]
+
+
+def mouse_moves(rate_hz: float, duration_s: float, click_every_s: float = 0) -> EventBuffer:
+    """
+    Mouse moving along a circle at a constant rate.
+
+    Args:
+        rate_hz: Number of moves per second.
+        duration_s: Length of the stream, in seconds.
+        click_every_s: Interval between left clicks, 0 for no clicks.
+    """
+    buffer = EventBuffer(int(rate_hz * duration_s) + 1)
+    interval_us = 1_000_000 / rate_hz
+    click_every = int(click_every_s * rate_hz)
+
+    for i in range(int(rate_hz * duration_s)):
+        timestamp = int(i * interval_us)
+        angle = tau * i / rate_hz
+        x, y = int(960 + 400 * cos(angle)), int(540 + 400 * sin(angle))
+        buffer.append(timestamp, MOUSE, MOVE, x, y, None)
+
+        if click_every and i % click_every == click_every - 1:
+            buffer.append(timestamp, MOUSE, PRESSED_LEFT, x, y, None)
+            buffer.append(timestamp, MOUSE, RELEASED_LEFT, x, y, None)
+
+    return buffer
+
+
+def key_bursts(duration_s: float, burst_every_s: float = 0.5, burst_size: int = 50, spacing_us: int = 200) -> EventBuffer:
+    """
+    Bursts of fast typing (press + release per key) separated by pauses.
+
+    Args:
+        duration_s: Length of the stream, in seconds. The stream holds at
+                    least one burst, however short the duration.
+        burst_every_s: Interval between the start of two bursts.
+        burst_size: Number of keys typed per burst.
+        spacing_us: Interval between two events of a burst, in microseconds.
+    """
+    bursts = max(1, int(duration_s / burst_every_s))
+    buffer = EventBuffer(bursts * burst_size * 2)
+
+    for burst in range(bursts):
+        start = int(burst * burst_every_s * 1_000_000)
+        for i in range(burst_size):
+            key = KEYS[(burst + i) % len(KEYS)]
+            buffer.append(start + 2 * i * spacing_us, KEYBOARD, PRESSED, 0, 0, key)
+            buffer.append(start + (2 * i + 1) * spacing_us, KEYBOARD, RELEASED, 0, 0, key)
+
+    return buffer
+
+
+def mixed(rate_hz: float, duration_s: float, keys_per_s: float = 5, hold_us: int = 50_000) -> EventBuffer:
+    """
+    Mouse moves at a constant rate, a click every second and regular typing.
+
+    Args:
+        rate_hz: Number of moves per second.
+        duration_s: Length of the stream, in seconds.
+        keys_per_s: Number of keys typed per second.
+        hold_us: Time a key is held down, in microseconds.
+    """
+    moves = mouse_moves(rate_hz, duration_s, click_every_s=1)
+    m_timestamps, m_sources, m_types, m_x, m_y, _ = moves.get_columns()
+
+    key_interval_us = int(1_000_000 / keys_per_s)
+    count = int(duration_s * keys_per_s)
+    presses = (((i + 1) * key_interval_us, KEYBOARD, PRESSED, 0, 0, KEYS[i % len(KEYS)]) for i in range(count))
+    releases = (((i + 1) * key_interval_us + hold_us, KEYBOARD, RELEASED, 0, 0, KEYS[i % len(KEYS)]) for i in range(count))
+    rows = zip(m_timestamps, m_sources, m_types, m_x, m_y, repeat(None))
+
+    # Each stream is in timestamp order on its own, but a key can be released
+    # after the next one is pressed, so they are merged rather than appended
+    buffer = EventBuffer(len(moves) + 2 * count)
+    for row in heapq.merge(rows, presses, releases, key=itemgetter(0)):
+        buffer.append(*row)
+
+    for column in (m_timestamps, m_sources, m_types, m_x, m_y):
+        column.release()
+    return buffer
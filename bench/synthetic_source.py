@@ -0,0 +1,122 @@
+import logging
+from threading import Event, Thread
+from time import perf_counter_ns, sleep
+from typing import Optional
+
+from inputDevice.event_buffer import EventBuffer
+from inputDevice.input_source import EventCallback, InputSource
+from metrics.metrics import Histogram
+from utils.clock.clock import Clock
+
+class SyntheticSource(InputSource):
+    """
+    InputSource that plays a synthetic event stream (see bench.synthetic)
+    through its registered callback from its own listener thread, the same
+    way MouseRecorder and KeyboardRecorder do from the pynput threads.
+
+    Lets InputRecorder be driven with event storms without any device or
+    display. The time spent in every callback call is recorded, in
+    nanoseconds, so the cost the recorder puts on the listener threads can
+    be measured.
+
+    This class is not concurently safe, and start/stop methods should be handled carefully
+    """
+
+    def __init__(self, stream: EventBuffer, speed: float = 1):
+        """
+        Initialize the source.
+
+        Args:
+            stream (EventBuffer): The events to emit, their timestamps give the
+                                  time they are emitted at.
+            speed (float): Emission speed multiplier, 0 emits every event as
+                           fast as possible.
+        """
+        self.__stream = stream
+        self.__speed = speed
+        self.__callback: Optional[EventCallback] = None
+        self.__thread: Optional[Thread] = None
+        self.__stopping = Event()
+        self.__finished = Event()
+        self.__emitted = 0
+        self.__callback_ns = Histogram()
+        self.__logger = logging.getLogger("bench.SyntheticSource")
+
+    def register_callback(self, callback: EventCallback) -> None:
+        """
+        Register Event callback
+        """
+        self.__callback = callback
+        self.__logger.info("Callback registered")
+
+    def start(self):
+        """
+        Start emitting the stream if it is not already being emitted.
+        """
+        if self.__thread is None:
+            self.__stopping.clear()
+            self.__finished.clear()
+            self.__thread = Thread(target=self.__emit, daemon=True)
+            self.__thread.start()
+            self.__logger.info("Listener started")
+
+    def stop(self):
+        """
+        Stop emitting, waiting for the listener thread to end.
+        """
+        self.__stopping.set()
+        if self.__thread is not None:
+            self.__thread.join()
+
+        self.__thread = None
+        self.__logger.info("Listener stopped")
+
+    def wait_until_finished(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until the whole stream was emitted.
+
+        Returns:
+            bool: False if the timeout expired first.
+        """
+        return self.__finished.wait(timeout)
+
+    def get_emitted(self) -> int:
+        """
+        Get the number of events emitted so far.
+        """
+        return self.__emitted
+
+    def get_callback_ns(self) -> Histogram:
+        """
+        Get the histogram of the time spent in the callback, in nanoseconds.
+        """
+        return self.__callback_ns
+
+    def __emit(self):
+        """
+        Listener thread: call the callback for every event once it is due.
+        """
+        timestamps, sources, types, x, y, keys = self.__stream.get_columns()
+        key_table = self.__stream.get_key_table()
+        callback = self.__callback
+        histogram = self.__callback_ns
+        clock = Clock()
+
+        try:
+            for i in range(len(timestamps)):
+                if self.__speed:
+                    wait_us = timestamps[i] / self.__speed - clock.elapsed_us()
+                    if wait_us > 0:
+                        sleep(wait_us / 1_000_000)
+
+                if self.__stopping.is_set():
+                    break
+
+                start = perf_counter_ns()
+                callback(sources[i], types[i], x[i], y[i], key_table[keys[i]])
+                histogram.record(perf_counter_ns() - start)
+                self.__emitted += 1
+        finally:
+            for column in (timestamps, sources, types, x, y, keys):
+                column.release()
+            self.__finished.set()
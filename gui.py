@@ -5,15 +5,19 @@ from pynput import keyboard
 import argparse
 import logging
 
+from inputDevice.flush_policy import FlushPolicy
 from inputDevice.input_recorder import InputRecorder
 from outputDevice.output_controller import OutputController
+from outputDevice.scheduler import ConditionScheduler, HybridScheduler
 from keyboard.keyboard_recorder import KeyboardRecorder
 from keyboard.keyboard_controller import KeyboardController
 from mouse.mouse_recorder import MouseRecorder
 from mouse.mouse_controller import MouseController
+from mouse.mouse_simplifier import MoveSimplifier
 from mem.mem import MemoryMonitor
+from metrics.metrics import MetricsExporter, get_registry
 from ser.ser import Serialize
-from log.log import setup_logging
+from log.log import setup_logging, shutdown_logging
 
 class BotGUI(KeyboardRecorder):
     """
@@ -138,31 +142,176 @@ def parse_args() -> argparse.Namespace:
         default=1,
         help="Timeout between script runs."
     )
+    parser.add_argument(
+        "--scheduler",
+        type=str,
+        choices=["sleep", "hybrid"],
+        default="sleep",
+        help="How replay waits for each event: 'sleep' uses no CPU while waiting,\n"
+             "'hybrid' sleeps then spins right before each event for precise timing."
+    )
+    parser.add_argument(
+        "--spin_us",
+        type=int,
+        default=2000,
+        help="With the hybrid scheduler, how long to spin before each event (microseconds).\n"
+             "Higher is more precise but uses more CPU."
+    )
+    parser.add_argument(
+        "--simplify_px",
+        type=float,
+        default=0,
+        help="Drop recorded mouse moves closer than this many pixels to the simplified path (0 to disable)."
+    )
+    parser.add_argument(
+        "--max_move_rate",
+        type=float,
+        default=None,
+        help="Maximum number of recorded mouse moves kept per second (unlimited by default)."
+    )
+    parser.add_argument(
+        "--catch_up",
+        action="store_true",
+        help="When replay falls behind, collapse overdue mouse moves to catch up."
+    )
+    parser.add_argument(
+        "--segment_mb",
+        type=float,
+        default=None,
+        help="Write the recording as rolling segment files of about this many MB."
+    )
+    parser.add_argument(
+        "--segment_minutes",
+        type=float,
+        default=None,
+        help="Write the recording as rolling segment files covering about this many minutes."
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="Compress the recording (frames stay independently readable)."
+    )
+    parser.add_argument(
+        "--durability",
+        choices=[durability.value for durability in Serialize.Durability],
+        default=Serialize.Durability.NONE.value,
+        help="When the recording is fsynced: never, after every write, or every --fsync_ms."
+    )
+    parser.add_argument(
+        "--fsync_ms",
+        type=int,
+        default=1000,
+        help="Interval between two fsyncs of the recording with --durability interval."
+    )
+    parser.add_argument(
+        "--flush_events",
+        type=int,
+        default=100_000,
+        help="Hand recorded events to the serializer once this many are pending (0 for no limit)."
+    )
+    parser.add_argument(
+        "--flush_mb",
+        type=float,
+        default=None,
+        help="Hand recorded events to the serializer once they take this many megabytes."
+    )
+    parser.add_argument(
+        "--flush_seconds",
+        type=float,
+        default=15,
+        help="Longest time a recorded event waits before being handed to the serializer."
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=256,
+        help="Number of events per window decoded ahead of replay on a background thread (0 to disable)."
+    )
+    parser.add_argument(
+        "--cache_events",
+        type=int,
+        default=0,
+        help="Keep scripts of up to this many events decoded in memory between replay loops, "
+             "trading memory for a faster loop start (0, the default, to stream every loop from the file)."
+    )
+    parser.add_argument(
+        "--start_at",
+        type=float,
+        default=0,
+        help="Start replaying the recording from this many seconds in."
+    )
+    parser.add_argument(
+        "--metrics_path",
+        type=str,
+        default=None,
+        help="Append a JSON snapshot of the internal metrics to this file periodically (disabled by default)."
+    )
+    parser.add_argument(
+        "--metrics_socket",
+        type=str,
+        default=None,
+        help="Send a JSON snapshot of the internal metrics to this Unix datagram socket periodically."
+    )
+    parser.add_argument(
+        "--metrics_interval",
+        type=float,
+        default=5,
+        help="Interval between two metrics snapshots, in seconds."
+    )
     return parser, parser.parse_args()
 
 def main():
     parser, args = parse_args()
 
-    ser = Serialize(args.events_path)
+    exporter = None
+    if args.metrics_path or args.metrics_socket:
+        # Enabled before creating the subsystems so they get real metrics
+        get_registry().enable()
+        exporter = MetricsExporter(get_registry(), args.metrics_path, args.metrics_socket, args.metrics_interval)
+        exporter.start()
+
+    ser = Serialize(
+        args.events_path,
+        segment_bytes=int(args.segment_mb * 1024 * 1024) if args.segment_mb else None,
+        segment_us=int(args.segment_minutes * 60_000_000) if args.segment_minutes else None,
+        compress=args.compress,
+        durability=Serialize.Durability(args.durability),
+        fsync_interval_ms=args.fsync_ms
+    )
 
     input_recorder = InputRecorder(
         sources=[MouseRecorder(), KeyboardRecorder()],
-        ser=ser
+        ser=ser,
+        simplifier=MoveSimplifier(args.simplify_px, args.max_move_rate)
+            if args.simplify_px > 0 or args.max_move_rate else None,
+        flush_policy=FlushPolicy(
+            max_events=args.flush_events or None,
+            max_bytes=int(args.flush_mb * 1024 * 1024) if args.flush_mb else None,
+            max_latency=args.flush_seconds
+        )
     )
 
     output_controller = OutputController(
         handlers=[MouseController(), KeyboardController()],
         ser=ser,
-        timeout=args.timeout
+        timeout=args.timeout,
+        scheduler=HybridScheduler(args.spin_us) if args.scheduler == "hybrid" else ConditionScheduler(),
+        catch_up=args.catch_up,
+        start_at=int(args.start_at * 1_000_000),
+        prefetch=args.prefetch,
+        cache_events=args.cache_events
     )
 
     memMonitor = MemoryMonitor()
 
     run_gui(input_recorder, output_controller, memMonitor)
 
+    if exporter is not None:
+        exporter.stop()
+
 
 if __name__ == "__main__":
     setup_logging()
     logging.info("Start run")
     main()
-    logging.shutdown()
\ No newline at end of file
+    shutdown_logging()
\ No newline at end of file
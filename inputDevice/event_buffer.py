@@ -0,0 +1,143 @@
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+COORDINATE_MIN = -(1 << 31)
+COORDINATE_MAX = (1 << 31) - 1
+KEY_ID_MAX = (1 << 16) - 1
+
+def to_coordinate(value) -> int:
+    """
+    Convert a coordinate to a value its int32 column can hold: floats (as
+    reported on macOS) are rounded, out of range values clamped and
+    non-finite ones replaced by 0.
+    """
+    try:
+        value = round(value)
+    except (ValueError, OverflowError):
+        return 0
+    return min(max(value, COORDINATE_MIN), COORDINATE_MAX)
+
+class EventBuffer:
+    """
+    Growable struct-of-arrays buffer of recorded events.
+
+    Each event field lives in its own typed array (the same columns the
+    recording is stored with, see ser.codec), so appending an event does not
+    allocate any Python object and handing a batch over is just a matter of
+    passing the buffer along. Key strings are interned into a small table
+    and stored as 1-based ids, 0 meaning no key, so a buffer holds at most
+    KEY_ID_MAX distinct keys.
+
+    This class is not thread-safe.
+    """
+
+    # Bytes per event across the in-memory columns
+    ROW_BYTES = 8 + 1 + 1 + 4 + 4 + 2
+
+    def __init__(self, capacity: int = 1024):
+        """
+        Initialize the buffer.
+
+        Args:
+            capacity (int): Number of events preallocated, the buffer doubles
+                            its capacity whenever it gets full.
+        """
+        capacity = max(1, capacity)
+        self.__size = 0
+        self.__capacity = capacity
+
+        self.__timestamps = array("q", bytes(8 * capacity))
+        self.__sources = array("B", bytes(capacity))
+        self.__types = array("B", bytes(capacity))
+        self.__x = array("i", bytes(4 * capacity))
+        self.__y = array("i", bytes(4 * capacity))
+        self.__keys = array("H", bytes(2 * capacity))
+
+        self.__key_ids: Dict[str, int] = {}
+        self.__key_table: List[Optional[str]] = [None]
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def __grow(self):
+        """
+        Double the capacity of every column.
+        """
+        for column in (self.__timestamps, self.__sources, self.__types, self.__x, self.__y, self.__keys):
+            column.frombytes(bytes(column.itemsize * self.__capacity))
+        self.__capacity *= 2
+
+    def append(self, timestamp: int, source: int, event_type: int, x: int, y: int, key: Optional[str]):
+        """
+        Append one event.
+
+        Args:
+            timestamp (int): Time elapsed since the start of the recording.
+            source (int): The InputSource value of the event.
+            event_type (int): The EventType value of the payload.
+            x (int): The x coordinate, 0 when unused, see to_coordinate.
+            y (int): The y coordinate, 0 when unused, see to_coordinate.
+            key (Optional[str]): The serialized key, None when unused.
+
+        Raises:
+            ValueError: If key would be the KEY_ID_MAX + 1th distinct key of
+                        the buffer. Nothing is appended then.
+        """
+        i = self.__size
+        if i == self.__capacity:
+            self.__grow()
+
+        if key is None:
+            key_id = 0
+        else:
+            key_id = self.__key_ids.get(key)
+            if key_id is None:
+                key_id = len(self.__key_table)
+                if key_id > KEY_ID_MAX:
+                    raise ValueError(f"An EventBuffer holds at most {KEY_ID_MAX} distinct keys")
+                self.__key_ids[key] = key_id
+                self.__key_table.append(key)
+
+        self.__timestamps[i] = timestamp
+        self.__sources[i] = source
+        self.__types[i] = event_type
+        try:
+            self.__x[i] = x
+            self.__y[i] = y
+        except (TypeError, OverflowError):
+            self.__x[i] = to_coordinate(x)
+            self.__y[i] = to_coordinate(y)
+        self.__keys[i] = key_id
+
+        self.__size = i + 1
+
+    def get_columns(self) -> Tuple[memoryview, memoryview, memoryview, memoryview, memoryview, memoryview]:
+        """
+        Get views over the filled part of each column.
+
+        The views must be released before appending to the buffer again.
+
+        Returns:
+            Tuple: The timestamps, sources, types, x, y and key id columns.
+        """
+        size = self.__size
+        return tuple(
+            memoryview(column)[:size]
+            for column in (self.__timestamps, self.__sources, self.__types, self.__x, self.__y, self.__keys)
+        )
+
+    def get_bytes(self) -> int:
+        """
+        Get the size of the events held in memory, ROW_BYTES per event.
+
+        Encoded on disk an event takes 16 bytes (timestamps are stored as
+        int32 deltas), or less when compressed, so this overestimates the
+        size of the frames written for them.
+        """
+        return self.__size * self.ROW_BYTES
+
+    def get_key_table(self) -> List[Optional[str]]:
+        """
+        Get the interned keys, indexed by key id (index 0 is None).
+        """
+        return self.__key_table
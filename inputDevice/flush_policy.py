@@ -0,0 +1,65 @@
+from typing import Optional
+
+from inputDevice.event_buffer import EventBuffer
+
+class FlushPolicy:
+    """
+    Decides when the InputRecorder hands the events it recorded over to
+    the serializer.
+
+    A batch is flushed as soon as any threshold is reached, so max_events
+    and max_bytes bound the memory held by the recorder while max_latency
+    bounds how much input a crash can lose. A threshold set to None is
+    not checked.
+
+    Attributes:
+        max_events (Optional[int]): Number of events a batch is flushed at.
+        max_bytes (Optional[int]): In-memory size, in bytes, a batch is flushed at (see EventBuffer.get_bytes).
+        max_latency (Optional[float]): Time, in seconds, an event waits at most before being flushed.
+        flush_on_stop (bool): Flush the last batch when the recorder stops, instead of discarding it.
+    """
+
+    def __init__(self, max_events: Optional[int] = 100_000, max_bytes: Optional[int] = None,
+                 max_latency: Optional[float] = 15, flush_on_stop: bool = True):
+        for name, value in (("max_events", max_events), ("max_bytes", max_bytes), ("max_latency", max_latency)):
+            if value is not None and value <= 0:
+                raise ValueError(f"{name} must be positive")
+
+        self.max_events = max_events
+        self.max_bytes = max_bytes
+        self.max_latency = max_latency
+        self.flush_on_stop = flush_on_stop
+
+    def get_event_limit(self) -> Optional[int]:
+        """
+        Get the number of events a batch is flushed at, whichever of the
+        count and size thresholds comes first.
+
+        Returns:
+            Optional[int]: The number of events, None if neither is set.
+        """
+        limits = [self.max_events] if self.max_events is not None else []
+        if self.max_bytes is not None:
+            limits.append(max(1, self.max_bytes // EventBuffer.ROW_BYTES))
+        return min(limits, default=None)
+
+    def is_due(self, batch: EventBuffer, age: float) -> bool:
+        """
+        Check whether a batch must be flushed.
+
+        Args:
+            batch (EventBuffer): The events not flushed yet.
+            age (float): Time, in seconds, since the oldest of them was recorded.
+        """
+        if not len(batch):
+            return False
+
+        if self.max_events is not None and len(batch) >= self.max_events:
+            return True
+        if self.max_bytes is not None and batch.get_bytes() >= self.max_bytes:
+            return True
+        return self.max_latency is not None and age >= self.max_latency
+
+    def __repr__(self) -> str:
+        return (f"FlushPolicy(max_events={self.max_events}, max_bytes={self.max_bytes}, "
+                f"max_latency={self.max_latency}, flush_on_stop={self.flush_on_stop})")
@@ -1,5 +1,6 @@
 from enum import Enum
 from abc import ABC, abstractmethod
+from typing import Optional, Tuple
 
 from utils.atomic.atomic import AtomicCounter
 
@@ -13,16 +14,68 @@ class InputSource(Enum):
 class InputPayload(ABC):
     """
     Abstracts interface for any device-specific event payload (e.g MouseEvent, KeyboardEvent).
+
+    Payloads are held by the million during long sessions, so subclasses
+    declare __slots__ instead of carrying an instance __dict__.
     """
+    __slots__ = ()
 
     @abstractmethod
     def __repr__(self) -> str:
-        raise NotImplemented
+        raise NotImplementedError
     
     @abstractmethod
     def getSourceType(self) -> InputSource:
-        raise NotImplemented
-    
+        raise NotImplementedError
+
+    @abstractmethod
+    def to_record(self) -> Tuple[int, int, int, Optional[str]]:
+        """
+        Flatten the payload into the fixed set of fields stored on disk.
+
+        Returns:
+            Tuple[int, int, int, Optional[str]]: The event type value, the x and
+            y coordinates and the serialized key (0 or None when unused).
+        """
+        raise NotImplementedError
+
+    @classmethod
+    @abstractmethod
+    def from_record(cls, event_type: int, x: int, y: int, key: Optional[str]) -> "InputPayload":
+        """
+        Rebuild a payload from the fields produced by to_record.
+        """
+        raise NotImplementedError
+
+    def __getstate__(self) -> dict:
+        return _get_slots(self)
+
+    def __setstate__(self, state):
+        _set_slots(self, state)
+
+
+def _get_slots(instance: object) -> dict:
+    """
+    Get the state of a slotted instance as a plain dict, which every pickle
+    protocol can store.
+    """
+    return {name: getattr(instance, name)
+            for cls in type(instance).__mro__ for name in getattr(cls, "__slots__", ())}
+
+
+def _set_slots(instance: object, state):
+    """
+    Restore a pickled slotted instance, also accepting the plain __dict__
+    state pickled before the class had __slots__.
+    """
+    if isinstance(state, tuple):
+        dict_state, slots_state = state
+        state = {**(dict_state or {}), **(slots_state or {})}
+
+    for name, value in state.items():
+        setattr(instance, name, value)
+
+
 class InputEvent:
     """
     Wraps a device-specific InputPayload with a source tag, allowing any number of input types to
@@ -31,16 +84,32 @@ class InputEvent:
     Attributes:
         source (InputEvent.Source): Which device produced this event.
         payload (InputPayload): The underlying device-specific event.
-        timestamp (int): Milliseconds elapsed since the start of recording,
+        timestamp (int): Microseconds elapsed since the start of recording,
                          shared across all InputEvents regardless of source.
         id (int): Unique, monotonically increasing identifier for this event.
+                  Ids are not stored in recordings, nor used to order replay.
     """
+    __slots__ = ("payload", "timestamp", "id")
+
     _id_counter: AtomicCounter = AtomicCounter()
 
-    def __init__(self, payload: InputPayload, timestamp: int):
+    def __init__(self, payload: InputPayload, timestamp: int, event_id: Optional[int] = None):
+        """
+        Args:
+            payload: The underlying device-specific event.
+            timestamp: Microseconds elapsed since the start of recording.
+            event_id: The identifier of the event, e.g. its position in a buffer.
+                Taken from the shared lock-free counter when omitted.
+        """
         self.payload: InputPayload = payload
         self.timestamp: int = timestamp
-        self.id: int = InputEvent._id_counter.increment()
+        self.id: int = InputEvent._id_counter.increment() if event_id is None else event_id
+
+    def __getstate__(self) -> dict:
+        return _get_slots(self)
+
+    def __setstate__(self, state):
+        _set_slots(self, state)
 
     def __repr__(self) -> str:
         return (f"InputEvent(ID={self.id}, Timestamp={self.timestamp}, payload={self.payload})")
@@ -1,16 +1,47 @@
 import logging
-from datetime import datetime
-from typing import List
-from threading import Lock
+import heapq
+from functools import partial
+from operator import itemgetter
+from threading import Event
+from time import monotonic, perf_counter_ns
+from typing import List, Optional
 
-from inputDevice.input_event import InputEvent, InputPayload
+from inputDevice.event_buffer import EventBuffer
+from inputDevice.flush_policy import FlushPolicy
 from inputDevice.input_source import InputSource
+from inputDevice.ring_buffer import RingBuffer
+from metrics.metrics import get_registry
+from mouse.mouse_simplifier import MoveSimplifier
 from ser.ser import Serialize
+from utils.clock.clock import Clock
 from utils.thread.thread import Runnable
 
 class InputRecorder(Runnable):
+    """
+    Records events from a set of InputSources on a single timeline.
 
-    def __init__(self, sources: List[InputSource], ser: Serialize):
+    Each source writes into its own RingBuffer from its listener thread,
+    without taking any lock. The recorder thread periodically drains the
+    rings, merges them by timestamp into an EventBuffer and hands that
+    buffer to Serialize whenever its FlushPolicy says so.
+
+    Listener threads wake the recorder up early, through an Event, as soon
+    as a ring is half full or the batch would reach the event or byte
+    threshold of the policy, so bursts neither overflow the rings nor
+    grow the batch past its budget.
+
+    Serialize never blocks the recorder: when its queue is full, batches
+    are kept, in order, and handed over again on the next drains. At most
+    MAX_UNSENT batches are kept that way; past them the recorder stops
+    draining until the serializer catches up, so a slow disk makes the
+    rings drop (and count) events instead of growing memory.
+    """
+
+    DRAIN_INTERVAL = 0.1
+    MAX_UNSENT = 4
+
+    def __init__(self, sources: List[InputSource], ser: Serialize, ring_capacity: int = 1 << 15,
+                 simplifier: Optional[MoveSimplifier] = None, flush_policy: Optional[FlushPolicy] = None):
         """
         Initialize the InputRecorder with the set of sources it will
         coordinate and the serializer events will be written to.
@@ -19,19 +50,44 @@ class InputRecorder(Runnable):
             sources: The InputSource implementations to record from
                      (e.g. a MouseRecorder and a KeyboardRecorder).
             ser: The Serialize instance used to persist InputEvents.
+            ring_capacity: Number of events each source can buffer between
+                           two drains before new events get dropped.
+            simplifier: Optional MoveSimplifier applied to every batch before
+                        it is serialized.
+            flush_policy: When batches are handed to the serializer, a
+                          FlushPolicy with its default thresholds if None.
         """
         super().__init__()
         self.__sources = sources
         self.__ser = ser
+        self.__simplifier = simplifier
+        self.__policy = flush_policy if flush_policy is not None else FlushPolicy()
 
-        self.__eventLock: Lock = Lock()
-        self.__start_time: int = 0
-        self.__events: list[InputPayload] = []
+        self.__clock: Clock = Clock()
+        self.__events: EventBuffer = EventBuffer()
+        self.__rings: List[RingBuffer] = [RingBuffer(ring_capacity) for _ in self.__sources]
+        self.__dropped: int = 0
+
+        self.__wakeup = Event()
+        self.__stopping = False
+        self.__ring_capacity = self.__rings[0].get_capacity() if self.__rings else 1
+        self.__half_ring = max(1, self.__ring_capacity // 2)
+        self.__wake_at: int = self.__half_ring
+        self.__pending_since: Optional[float] = None
+        self.__unsent: List[EventBuffer] = []
+        self.__backlogged = False
 
         self.__logger = logging.getLogger("inputDevice.InputRecorder")
 
-        for source in self.__sources:
-            source.register_callback(self.__on_event)
+        registry = get_registry()
+        self.__events_metric = registry.counter("recorder.events")
+        self.__dropped_metric = registry.counter("recorder.dropped")
+        self.__batch_metric = registry.histogram("recorder.batch_events")
+        self.__flush_metric = registry.histogram("recorder.flush_us")
+        self.__unsent_metric = registry.gauge("recorder.unsent_batches")
+
+        for source, ring in zip(self.__sources, self.__rings):
+            source.register_callback(partial(self.__on_event, ring))
 
     def __start_listeners(self):
         """
@@ -51,15 +107,139 @@ class InputRecorder(Runnable):
         
         self.__logger.info("Input Recorder stopped")
 
-    def __on_event(self, eventPayload: InputPayload):
+    def __on_event(self, ring: RingBuffer, source: int, event_type: int, x: int, y: int, key: Optional[str]):
+        """
+        Handle event from a subRecorder, pushing its fields into the ring
+        of that subRecorder. Runs on the listener thread and never blocks.
+        """
+        ring.push(self.__clock.elapsed_us(), source, event_type, x, y, key)
+
+        if len(ring) >= self.__wake_at and not self.__wakeup.is_set():
+            self.__wakeup.set()
+
+    def __drain(self):
+        """
+        Move the events of every ring into the current EventBuffer, merged
+        by timestamp
+        """
+        size = len(self.__events)
+        for row in heapq.merge(*(ring.drain() for ring in self.__rings), key=itemgetter(0)):
+            try:
+                self.__events.append(*row)
+            except ValueError:
+                # The key table of the batch is full, the next batch starts an empty one
+                size -= len(self.__events)
+                self.__flush()
+                self.__events.append(*row)
+        self.__events_metric.inc(len(self.__events) - size)
+
+        if len(self.__events) and self.__pending_since is None:
+            self.__pending_since = monotonic()
+
+        self.__count_dropped()
+
+    def __count_dropped(self):
+        """
+        Report the events the rings dropped since the last call
+        """
+        dropped = self.get_dropped()
+        if dropped != self.__dropped:
+            self.__logger.warning(f"{dropped - self.__dropped} events dropped, the ring buffers were full")
+            self.__dropped_metric.inc(dropped - self.__dropped)
+            self.__dropped = dropped
+
+    def __update_wake_threshold(self):
+        """
+        Compute how many events a ring may hold before its listener wakes
+        the recorder up: half the ring, or an equal share, across the
+        rings, of what is left before the batch reaches the event limit of
+        the policy, so the rings together cannot overshoot it. Listeners
+        never wake a backlogged recorder, which does not drain anyway.
+        """
+        if self.__backlogged:
+            self.__wake_at = self.__ring_capacity + 1
+            return
+
+        wake_at = self.__half_ring
+        limit = self.__policy.get_event_limit()
+        if limit is not None and self.__rings:
+            wake_at = min(wake_at, max(1, (limit - len(self.__events)) // len(self.__rings)))
+        self.__wake_at = wake_at
+
+    def __flush(self, wait: bool = False):
+        """
+        Hand the current EventBuffer over to the serializer
+
+        Args:
+            wait: Wait for the serializer to have room instead of retrying later.
         """
-        Handle event from a subRecorder
+        start = perf_counter_ns()
+        batch = self.__events
+        self.__events = EventBuffer(len(batch))
+        self.__pending_since = None
+
+        if len(batch):
+            if self.__simplifier is not None:
+                batch = self.__simplifier.simplify(batch)
+            self.__unsent.append(batch)
+            self.__batch_metric.record(len(batch))
+
+        self.__send(wait)
+        self.__flush_metric.record((perf_counter_ns() - start) / 1_000)
+
+    def __send(self, wait: bool = False):
+        """
+        Hand the batches not accepted yet over to the serializer, in order,
+        until it refuses one.
+        """
+        if self.__ser is None:
+            self.__unsent.clear()
+
+        # Refusals are counted by the serializer (ser.rejected_batches)
+        while self.__unsent:
+            if not self.__ser.schedule_serialization(self.__unsent[0], wait=wait):
+                break
+            self.__unsent.pop(0)
+
+        self.__unsent_metric.set(len(self.__unsent))
+
+    def __update_backlog(self):
+        """
+        Check whether too many batches wait for the serializer to drain
+        the rings, logging when that changes.
+        """
+        backlogged = len(self.__unsent) >= self.MAX_UNSENT
+        if backlogged == self.__backlogged:
+            return
+
+        self.__backlogged = backlogged
+        if backlogged:
+            self.__logger.warning(f"Serializer behind by {len(self.__unsent)} batches, pausing the drain until it catches up")
+        else:
+            self.__logger.info("Serializer caught up, draining again")
+
+    def get_flush_policy(self) -> FlushPolicy:
         """
-        with self.__eventLock:
-            elapsed = datetime.now() - self.__start_time
-            elapsed_ms = int(elapsed.total_seconds() * 1_000)
-            self.__events.append(InputEvent(eventPayload, elapsed_ms))
+        Get the policy deciding when batches are handed to the serializer.
+        """
+        return self.__policy
+
+    def stop(self):
+        """
+        Stop recording, flushing the last batch unless the policy says otherwise.
+        """
+        # The loop waits on the wakeup event, which Runnable.stop does not notify
+        self.__stopping = True
+        self.__wakeup.set()
+        super().stop()
     
+    def get_dropped(self) -> int:
+        """
+        Get the number of events dropped since the recorder was created
+        because a ring buffer was full.
+        """
+        return sum(ring.get_dropped() for ring in self.__rings)
+
     def _run(self):
         """
         The main loop for the input recorder. This runs continuously while the state is RUNNING.
@@ -68,25 +248,52 @@ class InputRecorder(Runnable):
         if self.__ser is not None:
             self.__ser.start()
 
-        self.__start_time = datetime.now()
+        for ring in self.__rings:
+            ring.clear()
+        self.__events = EventBuffer()
+        self.__pending_since = None
+        self.__stopping = False
+        self.__backlogged = False
+        self.__update_wake_threshold()
+
+        self.__clock.restart()
         self.__start_listeners()
 
-        with self._condition:
-            while self._state == Runnable.State.RUNNING:
-                self._condition.wait(timeout=15)
+        while self._state == Runnable.State.RUNNING and not self.__stopping:
+            self.__wakeup.wait(timeout=self.DRAIN_INTERVAL)
+            self.__wakeup.clear()
+
+            if self.__backlogged:
+                # Leave the events in the rings, which drop what they cannot hold
+                self.__send()
+                self.__count_dropped()
+            else:
+                self.__drain()
 
-                with self.__eventLock:
-                    batch = self.__events
-                    self.__events = []
+                age = monotonic() - self.__pending_since if self.__pending_since is not None else 0
+                if self.__policy.is_due(self.__events, age):
+                    self.__flush()
+                elif self.__unsent:
+                    self.__send()
 
-                if self.__ser is not None:
-                    self.__ser.schedule_serialization(batch)
+            self.__update_backlog()
+            self.__update_wake_threshold()
 
         self.__stop_listeners()
+        self.__drain()
+        if self.__policy.flush_on_stop:
+            self.__flush(wait=True)
+        else:
+            if len(self.__events):
+                self.__logger.warning(f"Discarding the last {len(self.__events)} events, the flush policy does not flush on stop")
+            self.__send(wait=True)
+
+        if self.__unsent:
+            self.__logger.error(f"Serializer stopped, {sum(map(len, self.__unsent))} events not written")
+            self.__unsent.clear()
+            self.__unsent_metric.set(0)
+
         if self.__ser is not None:
             self.__ser.stop()
 
-        with self.__eventLock:
-            self.__events = []
-
         self.__logger.info("Input Recorder loop stopped")
\ No newline at end of file
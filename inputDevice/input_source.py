@@ -1,7 +1,13 @@
 from abc import ABC, abstractmethod
-from typing import Callable
+from typing import Callable, Optional
 
-from inputDevice.input_event import InputPayload
+EventCallback = Callable[[int, int, int, int, Optional[str]], None]
+"""
+Callback receiving one event as plain fields: the InputSource value, the
+payload EventType value, the x and y coordinates and the serialized key
+(see InputPayload.to_record). Sources call it on their listener thread, so
+no payload object has to be built per event.
+"""
 
 class InputSource(ABC):
     """
@@ -18,13 +24,13 @@ class InputSource(ABC):
     """
 
     @abstractmethod
-    def register_callback(self, callback: Callable[[InputPayload], None]) -> None:
+    def register_callback(self, callback: EventCallback) -> None:
         """
         Register a callback to be invoked every time this source produces
         a new Event
 
         Args:
-            callback: A function accepting a single InputPayload context
+            callback: A function accepting the fields of the event, see EventCallback
         """
         raise NotImplementedError
 
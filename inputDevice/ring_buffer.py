@@ -0,0 +1,118 @@
+from array import array
+from typing import List, Optional, Tuple
+
+from inputDevice.event_buffer import to_coordinate
+
+EventRow = Tuple[int, int, int, int, int, Optional[str]]
+
+class RingBuffer:
+    """
+    Bounded single-producer / single-consumer ring buffer of event fields.
+
+    The producer (a listener thread) only ever writes the slots and the head
+    index, the consumer (the recorder thread) only ever reads them and writes
+    the tail index. Each index is a single attribute store, so neither side
+    needs a lock and the producer never blocks: when the ring is full the
+    event is dropped and counted instead.
+
+    Only one thread may push and only one thread may drain at a time.
+    """
+
+    def __init__(self, capacity: int = 1 << 15):
+        """
+        Initialize the ring buffer.
+
+        Args:
+            capacity (int): Maximum number of events held, rounded up to a power of two.
+        """
+        size = 1
+        while size < capacity:
+            size <<= 1
+
+        self.__capacity = size
+        self.__mask = size - 1
+
+        self.__timestamps = array("q", bytes(8 * size))
+        self.__sources = array("B", bytes(size))
+        self.__types = array("B", bytes(size))
+        self.__x = array("i", bytes(4 * size))
+        self.__y = array("i", bytes(4 * size))
+        self.__keys: List[Optional[str]] = [None] * size
+
+        self.__head = 0
+        self.__tail = 0
+        self.__dropped = 0
+
+    def push(self, timestamp: int, source: int, event_type: int, x: int, y: int, key: Optional[str]) -> bool:
+        """
+        Append one event. Producer side, never blocks.
+
+        Returns:
+            bool: False if the ring was full and the event was dropped.
+        """
+        head = self.__head
+        if head - self.__tail >= self.__capacity:
+            self.__dropped += 1
+            return False
+
+        i = head & self.__mask
+        self.__timestamps[i] = timestamp
+        self.__sources[i] = source
+        self.__types[i] = event_type
+        try:
+            self.__x[i] = x
+            self.__y[i] = y
+        except (TypeError, OverflowError):
+            self.__x[i] = to_coordinate(x)
+            self.__y[i] = to_coordinate(y)
+        self.__keys[i] = key
+
+        # Publish the slot only once it is fully written
+        self.__head = head + 1
+        return True
+
+    def drain(self) -> List[EventRow]:
+        """
+        Take every event currently published. Consumer side.
+
+        Returns:
+            List[EventRow]: The events, oldest first, as
+            (timestamp, source, event_type, x, y, key) tuples.
+        """
+        head = self.__head
+        tail = self.__tail
+        mask = self.__mask
+
+        rows = []
+        for position in range(tail, head):
+            i = position & mask
+            rows.append((self.__timestamps[i], self.__sources[i], self.__types[i], self.__x[i], self.__y[i], self.__keys[i]))
+            self.__keys[i] = None
+
+        self.__tail = head
+        return rows
+
+    def clear(self):
+        """
+        Discard every event currently published. Consumer side.
+        """
+        self.drain()
+
+    def __len__(self) -> int:
+        """
+        Number of events published and not drained yet. Exact on the
+        consumer side, the producer may still count events being drained.
+        """
+        return self.__head - self.__tail
+
+    def get_dropped(self) -> int:
+        """
+        Get the number of events dropped because the ring was full.
+        """
+        return self.__dropped
+
+    def get_capacity(self) -> int:
+        """
+        Get the maximum number of events held.
+        """
+        return self.__capacity
@@ -0,0 +1,61 @@
+from threading import Lock
+from typing import Dict, List
+
+class KeyTable:
+    """
+    Process-wide interning table of serialized keys ("char:x", "name:shift").
+
+    Every distinct key string gets a small integer id, given once when the
+    first event using it is recorded or loaded. Replay can then resolve a
+    key with a list lookup on its id (see KeyboardController) instead of
+    parsing its string for every press and release.
+
+    Ids are only meaningful within the process, recordings keep storing the
+    key strings.
+    """
+
+    def __init__(self):
+        self.__ids: Dict[str, int] = {}
+        self.__keys: List[str] = []
+        self.__lock = Lock()
+
+    def intern(self, key: str) -> int:
+        """
+        Get the id of a key, giving it a new one if it was never seen.
+
+        Args:
+            key (str): The serialized key.
+
+        Returns:
+            int: Its id, an index in the table.
+        """
+        key_id = self.__ids.get(key)
+        if key_id is not None:
+            return key_id
+
+        # Keys are recorded and decoded from different threads
+        with self.__lock:
+            key_id = self.__ids.get(key)
+            if key_id is None:
+                key_id = len(self.__keys)
+                self.__keys.append(key)
+                self.__ids[key] = key_id
+            return key_id
+
+    def get_key(self, key_id: int) -> str:
+        """
+        Get the serialized key of an id.
+        """
+        return self.__keys[key_id]
+
+    def __len__(self) -> int:
+        return len(self.__keys)
+
+
+_table = KeyTable()
+
+def get_key_table() -> KeyTable:
+    """
+    Get the process-wide key table.
+    """
+    return _table
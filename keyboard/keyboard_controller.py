@@ -1,14 +1,26 @@
 from pynput import keyboard
-from typing import Set
+from threading import Lock
+from typing import Callable, List, Optional, Set, Tuple
 import logging
 
+from keyboard.key_table import get_key_table
 from keyboard.keyboard_event import KeyboardEvent
 from inputDevice.input_event import InputPayload, InputSource
 from outputDevice.output_handler import OutputHandler
 
 class KeyboardController(OutputHandler):
+    """
+    Replays KeyboardEvents with pynput.
+
+    Each key of the process-wide KeyTable is resolved to a pynput key the
+    first time it is replayed, so replaying an event is a list lookup on
+    its key id.
+    """
+
     def __init__(self):
         self.__controller = keyboard.Controller()
+        self.__keys: List[Optional[keyboard.Key]] = []
+        self.__keys_lock = Lock()
         self.__logger = logging.getLogger("keyboard.KeyboardController")
 
     def get_supported_sources(self) -> Set[InputSource]:
@@ -22,17 +34,72 @@ class KeyboardController(OutputHandler):
         self._parse_event(event)
 
     def _parse_event(self, event: KeyboardEvent):
-        self.__logger.debug(event)
+        debug = self.__logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            self.__logger.debug("%s", event)
 
         try:
-            key: keyboard.Key = event.get_key_value()
-        except ValueError as e:
-            self.__logger.error(f"Failed to deserialize event: {e}")
+            key = self.__keys[event.key_id]
+        except IndexError:
+            key = self.__resolve(event.key_id)
+
+        if key is None:
+            self.__logger.error(f"Failed to deserialize event, unknown key {event.key}")
             return
 
         if event.event_type == KeyboardEvent.EventType.PRESSED:
             self.__controller.press(key)
-            self.__logger.debug(f"Pressed key {key}")
+            if debug:
+                self.__logger.debug("Pressed key %s", key)
         elif event.event_type == KeyboardEvent.EventType.RELEASED:
             self.__controller.release(key)
-            self.__logger.debug(f"Released key {key}")
\ No newline at end of file
+            if debug:
+                self.__logger.debug("Released key %s", key)
+
+    def compile(self, payloads: List[KeyboardEvent]) -> List[Tuple[Callable[[object], None], object]]:
+        """
+        Pre-bind the replay of keyboard events to the press or release of
+        their resolved key.
+
+        Args:
+            payloads: The keyboard events to compile, in replay order
+        """
+        calls = []
+        # Bound once, every step shares the same method objects
+        press, release = self.__controller.press, self.__controller.release
+
+        for event in payloads:
+            try:
+                key = self.__keys[event.key_id]
+            except IndexError:
+                key = self.__resolve(event.key_id)
+
+            if key is None:
+                # Logs the error when replayed
+                calls.append((self._parse_event, event))
+            elif event.event_type == KeyboardEvent.EventType.PRESSED:
+                calls.append((press, key))
+            else:
+                calls.append((release, key))
+
+        return calls
+
+    def __resolve(self, key_id: int) -> Optional[keyboard.Key]:
+        """
+        Resolve the keys interned since the last call, up to key_id.
+
+        Returns:
+            Optional[keyboard.Key]: The key of key_id, None if it is unknown to pynput.
+        """
+        table = get_key_table()
+
+        # Plans are compiled on the prefetch thread, while overdue events are replayed directly
+        with self.__keys_lock:
+            for new_id in range(len(self.__keys), key_id + 1):
+                try:
+                    self.__keys.append(KeyboardEvent.resolve_key(table.get_key(new_id)))
+                except ValueError as e:
+                    self.__logger.error(f"Cannot resolve key: {e}")
+                    self.__keys.append(None)
+
+            return self.__keys[key_id]
@@ -1,7 +1,16 @@
-from pynput import keyboard
 from enum import Enum
+from typing import Optional, Tuple
 
 from inputDevice.input_event import InputPayload, InputSource
+from keyboard.key_table import get_key_table
+
+# pynput needs a display on Linux, and fails to import without one. Only
+# converting keys needs it, so recordings can still be decoded (and
+# replayed into a headless handler) on machines without a display.
+try:
+    from pynput import keyboard
+except ImportError:
+    keyboard = None
 
 class KeyboardEvent(InputPayload):
     """
@@ -12,7 +21,8 @@ class KeyboardEvent(InputPayload):
 
     Attributes:
         event_type  (KeyboardEvent): The type of the keyboard event (PRESSED, RELEASED)
-        event_value (int): The value of the key pressed
+        key         (str): The serialized key, see serialize_key
+        key_id      (int): The id of key in the process-wide KeyTable
         timestamp   (datetime): The timestamp when the event was created
     """
 
@@ -27,21 +37,37 @@ class KeyboardEvent(InputPayload):
         PRESSED = 0
         RELEASED = 1
 
+    __slots__ = ("event_type", "key", "key_id")
+
     def getSourceType(self) -> InputSource:
         return InputSource.KEYBOARD
     
-    def __init__(self, event_type: EventType, key: keyboard.Key):
+    def __init__(self, event_type: EventType, key: "keyboard.Key"):
         self.event_type: KeyboardEvent.EventType = event_type
-        self.key: str = self.__serialize_key(key)
+        table = get_key_table()
+        self.key_id: int = table.intern(self.serialize_key(key))
+        # The interned string, shared by every event of that key
+        self.key: str = table.get_key(self.key_id)
 
-    def __serialize_key(self, key: keyboard.Key):
+    @staticmethod
+    def serialize_key(key: "keyboard.Key") -> str:
         if isinstance(key, keyboard.KeyCode):
             return f"char:{key.char}"
         else:
             return f"name:{key.name}"
 
-    def get_key_value(self) -> keyboard.Key:
-        kind, value = self.key.split(':', 1)
+    def get_key_value(self) -> "keyboard.Key":
+        return self.resolve_key(self.key)
+
+    @staticmethod
+    def resolve_key(key: str) -> "keyboard.Key":
+        """
+        Convert a serialized key back to a pynput key.
+
+        Raises:
+            ValueError: If the key name is unknown.
+        """
+        kind, value = key.split(':', 1)
         if kind == "char":
             return keyboard.KeyCode.from_char(value)
         else:
@@ -50,6 +76,28 @@ class KeyboardEvent(InputPayload):
             except AttributeError:
                 raise ValueError(f"Unkown key name '{value}'")
 
+    def to_record(self) -> Tuple[int, int, int, Optional[str]]:
+        return self.event_type.value, 0, 0, self.key
+
+    @classmethod
+    def from_record(cls, event_type: int, x: int, y: int, key: Optional[str]) -> "KeyboardEvent":
+        event = cls.__new__(cls)
+        event.event_type = cls.EventType(event_type)
+        table = get_key_table()
+        event.key_id = table.intern(key)
+        event.key = table.get_key(event.key_id)
+        return event
+
+    def __getstate__(self) -> dict:
+        # Key ids are only meaningful within the process that gave them
+        return {"event_type": self.event_type, "key": self.key}
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        table = get_key_table()
+        self.key_id = table.intern(self.key)
+        self.key = table.get_key(self.key_id)
+
     def __repr__(self) -> str:
         return (f"KeyboardEvent(Ievent_type={self.event_type.name}, KeyValue={self.key})")
         
\ No newline at end of file
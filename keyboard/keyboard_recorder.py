@@ -1,9 +1,8 @@
 from pynput import keyboard
-from typing import Callable
 import logging
 
-from inputDevice.input_event import InputPayload
-from inputDevice.input_source import InputSource
+from inputDevice.input_event import InputSource as EventSource
+from inputDevice.input_source import EventCallback, InputSource
 from keyboard.keyboard_event import KeyboardEvent
 
 class KeyboardRecorder(InputSource):
@@ -21,11 +20,11 @@ class KeyboardRecorder(InputSource):
         Initalize the keyboardRecorder
         """
         super().__init__()
-        self.__callback: Callable[[InputPayload], None] = None
+        self.__callback: EventCallback = None
         self.__listener: keyboard.Listener = None
         self.__logger = logging.getLogger("keyboard.KeyboardRecorder")
 
-    def register_callback(self, callback: Callable[[InputPayload], None]) -> None:
+    def register_callback(self, callback: EventCallback) -> None:
         """
         Register Event callback
         """
@@ -72,9 +71,10 @@ class KeyboardRecorder(InputSource):
         """
         Handle a generic event
         """
-        event = KeyboardEvent(eventType, key)
+        serialized_key = KeyboardEvent.serialize_key(key)
         if self.__callback is not None:
-            self.__callback(event)
+            self.__callback(EventSource.KEYBOARD.value, eventType.value, 0, 0, serialized_key)
 
-        self.__logger.debug(event)
+        if self.__logger.isEnabledFor(logging.DEBUG):
+            self.__logger.debug("KeyboardEvent(event_type=%s, KeyValue=%s)", eventType.name, serialized_key)
 
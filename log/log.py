@@ -1,16 +1,33 @@
 import logging
 import logging.config
+import logging.handlers
+import queue
 import yaml
 import os
 import sys
 
+_listener: logging.handlers.QueueListener = None
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves the records untouched, so the message is only
+    formatted by the real handlers on the listener thread instead of on the
+    thread that logged it (listener, replay, ...).
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
 def setup_logging():
+    global _listener
+
     # Determine the correct path for the logging configuration
     if getattr(sys, 'frozen', False):
         logging_yaml_path = os.path.join(sys._MEIPASS, 'log', 'logging.yaml')
     else:
         logging_yaml_path = os.path.join(os.path.dirname(__file__), 'logging.yaml')
-    
+
     # Load the logging configuration
     with open(logging_yaml_path, 'r') as config_file:
         config = yaml.safe_load(config_file)
@@ -25,3 +42,29 @@ def setup_logging():
 
     # Apply the logging configuration
     logging.config.dictConfig(config)
+
+    # Move the root handlers behind a queue, written by a background thread,
+    # so logging never blocks the listener or replay threads on file I/O
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    for handler in handlers:
+        root.removeHandler(handler)
+
+    log_queue = queue.SimpleQueue()
+    root.addHandler(_DeferredQueueHandler(log_queue))
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging():
+    """
+    Write the records still queued, then flush and close every handler.
+    """
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+    logging.shutdown()
@@ -6,6 +6,8 @@ from threading import Lock
 
 import logging
 
+from metrics.metrics import get_registry
+
 class MemoryMonitor(Runnable):
     """
     A class to monitor the memory usage of the current process.
@@ -25,6 +27,8 @@ class MemoryMonitor(Runnable):
         self.min = self.current
         self.max = self.current
 
+        self.__rss_metric = get_registry().gauge("mem.rss_bytes")
+
         self.__logger = logging.getLogger("mem.MemoryMonitor")
 
     def _run(self):
@@ -42,6 +46,7 @@ class MemoryMonitor(Runnable):
                     self.current = self.process.memory_info().rss
                     self.min = min(self.min, self.current)
                     self.max = max(self.max, self.current)
+                    self.__rss_metric.set(self.current)
 
                     self.__logger.info(f"Current: {self.current / (1024 * 1024):.2f} MB, "
                         f"Min: {self.min / (1024 * 1024):.2f} MB, "
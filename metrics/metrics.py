@@ -0,0 +1,278 @@
+import json
+import logging
+import socket
+import time
+from threading import Lock
+from typing import Dict, List, Optional
+
+from utils.thread.thread import Runnable
+
+class Counter:
+    """
+    Monotonic count of occurrences (events recorded, bytes written, ...).
+
+    Updates are plain attribute stores, so a counter should only be
+    incremented from one thread. Reading it from another thread is fine.
+    """
+
+    def __init__(self):
+        self.__value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        self.__value += amount
+
+    def get(self) -> int:
+        return self.__value
+
+
+class Gauge:
+    """
+    Last value of a quantity that goes up and down (queue length, RSS, ...).
+    """
+
+    def __init__(self):
+        self.__value: float = 0
+
+    def set(self, value: float) -> None:
+        self.__value = value
+
+    def get(self) -> float:
+        return self.__value
+
+
+class Histogram:
+    """
+    Distribution of a measurement (durations, sizes, ...) with power-of-two
+    buckets: bucket 0 holds values <= 0, bucket n holds [2^(n-1), 2^n).
+
+    Like Counter, a histogram should only be recorded into from one thread.
+    Histograms can also be created on their own, outside any registry (see
+    LatenessHistogram and the benchmarks).
+    """
+
+    BUCKETS = 40
+
+    def __init__(self):
+        self.__counts: List[int] = [0] * self.BUCKETS
+        self.__count = 0
+        self.__total = 0
+        self.__max = 0
+
+    def record(self, value: float) -> None:
+        value = max(0, int(value))
+        self.__counts[min(value.bit_length(), self.BUCKETS - 1)] += 1
+        self.__count += 1
+        self.__total += value
+        if value > self.__max:
+            self.__max = value
+
+    def get_count(self) -> int:
+        return self.__count
+
+    def get_mean(self) -> float:
+        return self.__total / self.__count if self.__count else 0
+
+    def get_max(self) -> int:
+        return self.__max
+
+    def get_percentile(self, percentile: float) -> int:
+        """
+        Get an upper bound of the given percentile.
+
+        Args:
+            percentile (float): The percentile, between 0 and 100.
+
+        Returns:
+            int: The upper bound of the bucket holding the percentile.
+        """
+        if not self.__count:
+            return 0
+
+        rank = percentile / 100 * self.__count
+        seen = 0
+        for bucket, count in enumerate(list(self.__counts)):
+            seen += count
+            if seen >= rank and count:
+                return min((1 << bucket) - 1, self.__max)
+
+        return self.__max
+
+    def get_buckets(self) -> List[int]:
+        """
+        Get a copy of the bucket counts.
+        """
+        return list(self.__counts)
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "count": self.__count,
+            "mean": round(self.get_mean(), 1),
+            "p50": self.get_percentile(50),
+            "p99": self.get_percentile(99),
+            "max": self.__max,
+        }
+
+
+class NullMetric:
+    """
+    Metric handed out by a disabled registry: every update is a no-op, so
+    instrumented hot paths only pay for an empty method call.
+    """
+
+    def inc(self, amount: int = 1) -> None:
+        pass
+
+    def set(self, value: float) -> None:
+        pass
+
+    def record(self, value: float) -> None:
+        pass
+
+
+NULL_METRIC = NullMetric()
+
+
+class MetricsRegistry:
+    """
+    Named counters, gauges and histograms published by the subsystems.
+
+    Subsystems fetch their metrics once, when they are created, and keep a
+    reference to them. While the registry is disabled it hands out
+    NULL_METRIC instead, so the registry must be enabled before creating the
+    subsystems to be measured.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.__enabled = enabled
+        self.__lock = Lock()
+        self.__counters: Dict[str, Counter] = {}
+        self.__gauges: Dict[str, Gauge] = {}
+        self.__histograms: Dict[str, Histogram] = {}
+
+    def enable(self) -> None:
+        """
+        Hand out real metrics from now on.
+        """
+        self.__enabled = True
+
+    def is_enabled(self) -> bool:
+        return self.__enabled
+
+    def counter(self, name: str) -> Counter:
+        """
+        Get the counter with the given name, creating it if needed.
+        """
+        return self.__get(self.__counters, name, Counter)
+
+    def gauge(self, name: str) -> Gauge:
+        """
+        Get the gauge with the given name, creating it if needed.
+        """
+        return self.__get(self.__gauges, name, Gauge)
+
+    def histogram(self, name: str) -> Histogram:
+        """
+        Get the histogram with the given name, creating it if needed.
+        """
+        return self.__get(self.__histograms, name, Histogram)
+
+    def __get(self, metrics: dict, name: str, factory):
+        if not self.__enabled:
+            return NULL_METRIC
+
+        with self.__lock:
+            metric = metrics.get(name)
+            if metric is None:
+                metric = metrics[name] = factory()
+            return metric
+
+    def snapshot(self) -> dict:
+        """
+        Get the current value of every metric.
+
+        Returns:
+            dict: JSON serializable values, keyed by metric kind then name.
+        """
+        with self.__lock:
+            counters = dict(self.__counters)
+            gauges = dict(self.__gauges)
+            histograms = dict(self.__histograms)
+
+        return {
+            "time": time.time(),
+            "counters": {name: counter.get() for name, counter in counters.items()},
+            "gauges": {name: gauge.get() for name, gauge in gauges.items()},
+            "histograms": {name: histogram.snapshot() for name, histogram in histograms.items()},
+        }
+
+
+_registry = MetricsRegistry()
+
+def get_registry() -> MetricsRegistry:
+    """
+    Get the process-wide registry, disabled until enabled explicitly.
+    """
+    return _registry
+
+
+class MetricsExporter(Runnable):
+    """
+    Periodically exports a snapshot of a registry, as one JSON line, to a
+    local file (appended) and/or a Unix datagram socket.
+
+    Nothing is exported when no listener is bound to the socket, the
+    snapshots are simply dropped so the exporter never blocks.
+    """
+
+    def __init__(self, registry: MetricsRegistry, path: Optional[str] = None, socket_path: Optional[str] = None,
+                 interval: float = 5):
+        """
+        Initialize the exporter.
+
+        Args:
+            registry: The registry to export.
+            path: File the snapshots are appended to, None to disable.
+            socket_path: Unix datagram socket the snapshots are sent to, None to disable.
+            interval: Interval between two snapshots, in seconds.
+        """
+        super().__init__()
+        self.__registry = registry
+        self.__path = path
+        self.__socket_path = socket_path
+        self.__interval = interval
+        self.__logger = logging.getLogger("metrics.MetricsExporter")
+
+    def export(self, sock: Optional[socket.socket] = None):
+        """
+        Export one snapshot.
+        """
+        line = json.dumps(self.__registry.snapshot()) + "\n"
+
+        if self.__path is not None:
+            with open(self.__path, "a") as file:
+                file.write(line)
+
+        if sock is not None:
+            try:
+                sock.sendto(line.encode(), self.__socket_path)
+            except OSError as e:
+                self.__logger.debug(f"Snapshot not sent to {self.__socket_path}: {e}")
+
+    def _run(self):
+        self.__logger.info("Metrics exporter started")
+
+        sock = None
+        if self.__socket_path is not None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.setblocking(False)
+
+        try:
+            with self._condition:
+                while self._state == Runnable.State.RUNNING:
+                    self._condition.wait(timeout=self.__interval)
+                    self.export(sock)
+        finally:
+            if sock is not None:
+                sock.close()
+
+        self.__logger.info("Metrics exporter stopped")
@@ -1,4 +1,6 @@
 from pynput.mouse import Button, Controller
+from functools import partial
+from typing import Callable, List, Optional, Tuple
 import logging
 
 from inputDevice.input_event import InputPayload, InputSource
@@ -10,6 +12,19 @@ class MouseController(OutputHandler):
         self.__controller: Controller = Controller()
         self.__logger = logging.getLogger("mouse.MouseController")
 
+        # Button action and button of every event type but MOVE
+        self.__buttons = {
+            MouseEvent.EventType.PRESSED_LEFT: (self.__controller.press, Button.left),
+            MouseEvent.EventType.RELEASED_LEFT: (self.__controller.release, Button.left),
+            MouseEvent.EventType.PRESSED_RIGHT: (self.__controller.press, Button.right),
+            MouseEvent.EventType.RELEASED_RIGHT: (self.__controller.release, Button.right),
+        }
+
+        # One-argument calls for compiled replay steps, taking the target position
+        self.__move = partial(setattr, self.__controller, "position")
+        self.__clicks = {event_type: partial(self.__click, action, button)
+                         for event_type, (action, button) in self.__buttons.items()}
+
     def get_supported_sources(self) -> set[InputSource]:
         return {InputSource.MOUSE}
 
@@ -20,6 +35,26 @@ class MouseController(OutputHandler):
 
         self._parse_event(event)
 
+    def handle_batch(self, payloads: List[InputPayload]):
+        """
+        Replay overdue mouse events, only moving to the last position of each
+        run of consecutive moves
+
+        Args:
+            payloads: The mouse events to replay, in order
+        """
+        for i, event in enumerate(payloads):
+            if event.getSourceType() != InputSource.MOUSE:
+                self.__logger.error(f"Mouse controller cannot handle event: {event}")
+                continue
+
+            if event.event_type == MouseEvent.EventType.MOVE and i + 1 < len(payloads) \
+                    and payloads[i + 1].getSourceType() == InputSource.MOUSE \
+                    and payloads[i + 1].event_type == MouseEvent.EventType.MOVE:
+                continue
+
+            self._parse_event(event)
+
     def _parse_event(self, event: MouseEvent):
         """
         Parse Mouse events with the intention to control the mouse
@@ -27,29 +62,45 @@ class MouseController(OutputHandler):
         Args:
             event: The mouse event
         """
-        self.__logger.debug(event)
+        debug = self.__logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            self.__logger.debug("%s", event)
 
-        if event.event_type == MouseEvent.EventType.MOVE:
-            self.__controller.position = (event.x, event.y)
-            self.__logger.debug("Moving mouse to {0}".format((event.x, event.y)))
-        else:
-            self.__controller.position = (event.x, event.y)
-            self.__logger.debug("Moving mouse to {0}".format((event.x, event.y)))
+        self.__controller.position = (event.x, event.y)
+        if debug:
+            self.__logger.debug("Moving mouse to (%d, %d)", event.x, event.y)
 
-            if event.event_type == MouseEvent.EventType.PRESSED_LEFT:
-                self.__controller.press(Button.left)
-                self.__logger.debug("Pressed left button at {0}".format((event.x, event.y)))
+        if event.event_type != MouseEvent.EventType.MOVE:
+            action, button = self.__buttons[event.event_type]
+            action(button)
+            if debug:
+                self.__logger.debug("%s at (%d, %d)", event.event_type.name, event.x, event.y)
+
+    def compile(self, payloads: List[MouseEvent]) -> List[Tuple[Callable[[object], None], object]]:
+        """
+        Pre-bind the replay of mouse events. A button event at the position
+        the previous event left the cursor at does not move it again.
+
+        Args:
+            payloads: The mouse events to compile, in replay order
+        """
+        calls = []
+        position: Optional[Tuple[int, int]] = None
 
-            elif event.event_type == MouseEvent.EventType.RELEASED_LEFT:
-                self.__controller.release(Button.left)
-                self.__logger.debug("Released left button at {0}".format((event.x, event.y)))
+        for event in payloads:
+            target = (event.x, event.y)
 
-            elif event.event_type == MouseEvent.EventType.PRESSED_RIGHT:
-                self.__controller.press(Button.right)
-                self.__logger.debug("Pressed right button at {0}".format((event.x, event.y)))
+            if event.event_type == MouseEvent.EventType.MOVE:
+                calls.append((self.__move, target))
+            elif target == position:
+                calls.append(self.__buttons[event.event_type])
+            else:
+                calls.append((self.__clicks[event.event_type], target))
 
-            elif event.event_type == MouseEvent.EventType.RELEASED_RIGHT:
-                self.__controller.release(Button.right)
-                self.__logger.debug("Released right button at {0}".format((event.x, event.y)))
+            position = target
 
+        return calls
 
+    def __click(self, action: Callable, button: Button, position: Tuple[int, int]):
+        self.__controller.position = position
+        action(button)
@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import Optional, Tuple
 
 from inputDevice.input_event import InputPayload, InputSource
 
@@ -31,6 +32,8 @@ class MouseEvent(InputPayload):
         RELEASED_LEFT = 3
         RELEASED_RIGHT = 4
 
+    __slots__ = ("event_type", "x", "y")
+
     def getSourceType(self) -> InputSource:
         return InputSource.MOUSE
 
@@ -39,6 +42,12 @@ class MouseEvent(InputPayload):
         self.x: int = x
         self.y: int = y
 
+    def to_record(self) -> Tuple[int, int, int, Optional[str]]:
+        return self.event_type.value, self.x, self.y, None
+
+    @classmethod
+    def from_record(cls, event_type: int, x: int, y: int, key: Optional[str]) -> "MouseEvent":
+        return cls(cls.EventType(event_type), x, y)
 
     def __repr__(self) -> str:
         return (f"MouseEvent(event_type={self.event_type.name}, x={self.x}, y={self.y})")
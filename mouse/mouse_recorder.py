@@ -1,9 +1,8 @@
-from typing import Callable
 from pynput import mouse
 import logging
 
-from inputDevice.input_event import InputPayload
-from inputDevice.input_source import InputSource
+from inputDevice.input_event import InputSource as EventSource
+from inputDevice.input_source import EventCallback, InputSource
 from mouse.mouse_event import MouseEvent
 
 class MouseRecorder(InputSource):
@@ -19,11 +18,11 @@ class MouseRecorder(InputSource):
         """
         Initialize the MouseRecorder.
         """
-        self.__callback: Callable[[InputPayload], None] = None
+        self.__callback: EventCallback = None
         self.__listener: mouse.Listener = None
         self.__logger = logging.getLogger("mouse.MouseRecorder")
 
-    def register_callback(self, callback: Callable[[InputPayload], None]) -> None:
+    def register_callback(self, callback: EventCallback) -> None:
         """
         Register Event callback
         """
@@ -50,14 +49,18 @@ class MouseRecorder(InputSource):
         self.__listener = None
         self.__logger.info("Listener stopped")
 
-    def __on_event(self, event: MouseEvent):
+    def __on_event(self, event_type: MouseEvent.EventType, x: int, y: int):
         """
         Handle Generic Events
+
+        Coordinates are forwarded as pynput reports them (floats on macOS),
+        the recorder converts them once buffered (see to_coordinate).
         """
         if self.__callback is not None:
-            self.__callback(event)
+            self.__callback(EventSource.MOUSE.value, event_type.value, x, y, None)
         
-        self.__logger.debug(event)
+        if self.__logger.isEnabledFor(logging.DEBUG):
+            self.__logger.debug("MouseEvent(event_type=%s, x=%s, y=%s)", event_type.name, x, y)
 
     def _on_move(self, x, y):
         """
@@ -67,7 +70,7 @@ class MouseRecorder(InputSource):
             x (int): The x-coordinate of the mouse pointer.
             y (int): The y-coordinate of the mouse pointer.
         """
-        self.__on_event(MouseEvent(MouseEvent.EventType.MOVE, x, y))
+        self.__on_event(MouseEvent.EventType.MOVE, x, y)
 
     def _on_click(self, x, y, button, pressed):
         """
@@ -86,7 +89,7 @@ class MouseRecorder(InputSource):
         else:
             return
 
-        self.__on_event(MouseEvent(event_type, x, y))
+        self.__on_event(event_type, x, y)
 
     def _on_scroll(self, x, y, dx, dy):
         """
@@ -0,0 +1,141 @@
+import logging
+from math import hypot
+from typing import List, Optional
+
+from inputDevice.event_buffer import EventBuffer
+from inputDevice.input_event import InputSource
+from mouse.mouse_event import MouseEvent
+
+class MoveSimplifier:
+    """
+    Post-processing stage that thins out mouse MOVE events of a recorded
+    EventBuffer before it is serialized.
+
+    Moves are grouped in runs: consecutive moves not interrupted by a mouse
+    click (keyboard events do not interrupt a run). Each run keeps its first
+    and last move, and in between:
+      - Ramer-Douglas-Peucker simplification drops the moves closer than
+        tolerance pixels to the simplified path,
+      - the max-rate resampler drops moves closer in time than 1/max_rate
+        seconds to the previous kept one.
+
+    Clicks and keyboard events are always kept untouched.
+    """
+
+    def __init__(self, tolerance: float = 0, max_rate: Optional[float] = None):
+        """
+        Initialize the simplifier.
+
+        Args:
+            tolerance (float): Maximum distance, in pixels, between a dropped move and
+                               the simplified path. 0 disables the simplification.
+            max_rate (Optional[float]): Maximum number of moves kept per second,
+                                        None disables the resampling.
+        """
+        self.__tolerance = tolerance
+        self.__min_interval_us = 1_000_000 / max_rate if max_rate else 0
+        self.__logger = logging.getLogger("mouse.MoveSimplifier")
+
+    def simplify(self, buffer: EventBuffer) -> EventBuffer:
+        """
+        Simplify the mouse moves of a buffer.
+
+        Args:
+            buffer: The recorded events, in timestamp order.
+
+        Returns:
+            EventBuffer: A new buffer with the kept events, or the same buffer
+            when nothing was dropped.
+        """
+        timestamps, sources, types, x, y, keys = buffer.get_columns()
+
+        mouse = InputSource.MOUSE.value
+        move = MouseEvent.EventType.MOVE.value
+
+        keep = [True] * len(buffer)
+        run: List[int] = []
+
+        for i in range(len(buffer)):
+            if sources[i] != mouse:
+                continue
+
+            if types[i] == move:
+                run.append(i)
+            else:
+                self.__simplify_run(run, timestamps, x, y, keep)
+                run = []
+
+        self.__simplify_run(run, timestamps, x, y, keep)
+
+        kept = keep.count(True)
+        if kept == len(buffer):
+            return buffer
+
+        key_table = buffer.get_key_table()
+        simplified = EventBuffer(kept)
+        for i in range(len(buffer)):
+            if keep[i]:
+                simplified.append(timestamps[i], sources[i], types[i], x[i], y[i], key_table[keys[i]])
+
+        self.__logger.debug(f"Simplified {len(buffer)} events to {kept}")
+        return simplified
+
+    def __simplify_run(self, run: List[int], timestamps, x, y, keep: List[bool]):
+        """
+        Clear the keep flag of the dropped moves of one run.
+        """
+        if len(run) < 3:
+            return
+
+        if self.__tolerance > 0:
+            kept = self.__douglas_peucker(run, x, y)
+        else:
+            kept = [True] * len(run)
+
+        if self.__min_interval_us > 0:
+            last = timestamps[run[0]]
+            for position in range(1, len(run) - 1):
+                if kept[position]:
+                    if timestamps[run[position]] - last < self.__min_interval_us:
+                        kept[position] = False
+                    else:
+                        last = timestamps[run[position]]
+
+        for position, index in enumerate(run):
+            if not kept[position]:
+                keep[index] = False
+
+    def __douglas_peucker(self, run: List[int], x, y) -> List[bool]:
+        """
+        Iterative Ramer-Douglas-Peucker over the points of one run.
+
+        Returns:
+            List[bool]: For each position of the run, whether the point is kept.
+        """
+        kept = [False] * len(run)
+        kept[0] = kept[-1] = True
+
+        stack = [(0, len(run) - 1)]
+        while stack:
+            first, last = stack.pop()
+
+            ax, ay = x[run[first]], y[run[first]]
+            bx, by = x[run[last]], y[run[last]]
+            dx, dy = bx - ax, by - ay
+            length2 = dx * dx + dy * dy
+
+            farthest, distance = -1, self.__tolerance
+            for position in range(first + 1, last):
+                px, py = x[run[position]], y[run[position]]
+                # Distance to the segment, not the line, so back-and-forth moves are kept
+                t = 0 if length2 == 0 else min(1, max(0, ((px - ax) * dx + (py - ay) * dy) / length2))
+                d = hypot(px - ax - t * dx, py - ay - t * dy)
+                if d > distance:
+                    farthest, distance = position, d
+
+            if farthest != -1:
+                kept[farthest] = True
+                stack.append((first, farthest))
+                stack.append((farthest, last))
+
+        return kept
@@ -1,12 +1,18 @@
 import logging
-from datetime import datetime
 from threading import Lock
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 from inputDevice.input_event import InputEvent, InputSource
+from metrics.metrics import get_registry
 from outputDevice.output_handler import OutputHandler
+from outputDevice.replay_cache import ReplayCache
+from outputDevice.replay_plan import ReplayPlan
+from outputDevice.scheduler import ConditionScheduler, LatenessHistogram, Scheduler
+from pipeline.pipeline import Pipeline
+from pipeline.stages import Prefetch
 from utils.thread.thread import Runnable
 from ser.ser import Serialize
+from utils.clock.clock import Clock
 
 
 class OutputController(Runnable):
@@ -18,16 +24,53 @@ class OutputController(Runnable):
     so individual handlers (KeyboardController, MouseController, ...) stay
     free of any timing/threading concerns and only implement how to replay
     their own payload type.
+
+    Recordings are compiled into a replay plan (see ReplayPlan) ahead of
+    replay, so replaying an event is only a wait and a pre-bound call.
     """
 
-    def __init__(self, handlers: List[OutputHandler], ser: Serialize, timeout: int):
+    def __init__(self, handlers: List[OutputHandler], ser: Serialize, timeout: int, scheduler: Optional[Scheduler] = None,
+                 catch_up: bool = False, pipeline: Optional[Pipeline] = None, start_at: int = 0,
+                 prefetch: int = 256, cache_events: int = 0):
+        """
+        Args:
+            handlers: The OutputHandlers events are dispatched to.
+            ser: The Serialize instance the recording is read from.
+            timeout: Timeout between script runs.
+            scheduler: How to wait for each event, a ConditionScheduler by default.
+            catch_up: When replay falls behind, dispatch every overdue event at once
+                      through OutputHandler.handle_batch, which may collapse them
+                      (e.g. consecutive mouse moves), instead of one by one.
+            pipeline: Optional Pipeline the recorded events are streamed through
+                      before being replayed (disk -> transform -> replay).
+            start_at: Time of the recording, in microseconds, replay starts from.
+                      The events before it are skipped through the reader index.
+            prefetch: Number of events per window read, decoded and compiled ahead on a
+                      background thread (see Prefetch), 0 to decode on the replay thread.
+            cache_events: Largest script, in events, whose compiled replay steps are kept
+                          in memory between loops (see ReplayCache). 0, the default,
+                          streams every loop from the memory-mapped file instead.
+        """
         super().__init__()
         self.__ser = ser
         self._timeout = timeout
         self._speed = 1
         self._speed_lock = Lock()
+        self.__clock = Clock()
+        self.__scheduler = scheduler if scheduler is not None else ConditionScheduler()
+        self.__lateness = LatenessHistogram()
+        self.__catch_up = catch_up
+        self.__pipeline = pipeline
+        self.__start_at = start_at
+        self.__prefetch = prefetch
+        self.__cache = ReplayCache(cache_events)
         self.__logger = logging.getLogger("outputDevice.OutputController")
 
+        registry = get_registry()
+        self.__events_metric = registry.counter("replay.events")
+        self.__lateness_metric = registry.histogram("replay.lateness_us")
+        self.__behind_metric = registry.gauge("replay.behind_us")
+
         self.__handlers_by_source: Dict[InputSource, OutputHandler] = {}
         for handler in handlers:
             for source in handler.get_supported_sources():
@@ -37,6 +80,8 @@ class OutputController(Runnable):
                     )
                 self.__handlers_by_source[source] = handler
 
+        self.__plan = ReplayPlan(self.__handlers_by_source)
+
     def update_speed(self, delta: float) -> bool:
         """
         Update the playback speed by a delta.
@@ -50,55 +95,165 @@ class OutputController(Runnable):
                 self.__logger.error("Failed to update speed because the value would be negative")
                 return False
 
-    def _parse_event(self, event: InputEvent):
+    def get_lateness(self) -> LatenessHistogram:
         """
-        Dispatch a single InputEvent to the handler registered for its
-        payload's source. Logs and skips the event if no handler supports it.
+        Get the lateness histogram of the last replay run.
+        """
+        return self.__lateness
+
+    def _parse_batch(self, events: List[InputEvent]):
+        """
+        Dispatch several overdue InputEvents at once. Each run of consecutive
+        events handled by the same handler is passed to its handle_batch,
+        so the order of events across handlers is preserved.
 
         Args:
-            event: The InputEvent to replay.
+            events: The InputEvents to replay, in order.
         """
-        source = event.payload.getSourceType()
-        handler = self.__handlers_by_source.get(source)
+        run_handler, payloads = None, []
+
+        for event in events:
+            source = event.payload.getSourceType()
+            handler = self.__handlers_by_source.get(source)
+
+            if handler is None:
+                self.__logger.error(f"No handler registered for source {source.name}, skipping event")
+                continue
+
+            if handler is not run_handler:
+                if payloads:
+                    run_handler.handle_batch(payloads)
+                run_handler, payloads = handler, []
 
-        if handler is None:
-            self.__logger.error(f"No handler registered for source {source.name}, skipping event")
-            return
+            payloads.append(event.payload)
 
-        handler.handle_event(event.payload)
+        if payloads:
+            run_handler.handle_batch(payloads)
+
+    def __is_running(self) -> bool:
+        return self._state == Runnable.State.RUNNING
+
+    def __replay(self, reader) -> bool:
+        """
+        Replay the recording once. Runs on the controller thread, which
+        holds the condition.
+
+        Returns:
+            bool: False if the recording had no event to replay.
+        """
+        with self._speed_lock:
+            speed = self._speed
+
+        lateness = LatenessHistogram()
+        self.__lateness = lateness
+
+        debug = self.__logger.isEnabledFor(logging.DEBUG)
+        origin = self.__start_at
+        key = (reader.get_key(), origin)
+        cached = self.__cache.get(key)
+
+        if cached is not None:
+            steps = iter(cached)
+        else:
+            source = reader.seek(origin) if origin else reader
+            stream = source if self.__pipeline is None else self.__pipeline.run(source)
+            stream = self.__plan.process(stream)
+            if self.__prefetch:
+                stream = Prefetch(self.__prefetch).process(stream)
+            steps = self.__cache.record(key, stream)
+
+        try:
+            step = next(steps, None)
+            if step is None:
+                return False
+
+            # Started once the first event is ready, so its loading time is not counted as lateness
+            self.__clock.restart()
+
+            while step is not None:
+                timestamp, event, call, argument = step
+                scaled_time = (timestamp - origin) / speed
+
+                if debug:
+                    self.__logger.debug("For next event %s, Waiting until %.6f seconds (speed=x%s)",
+                                        event, scaled_time / 1_000_000, speed)
+
+                self.__scheduler.wait_until(self._condition, self.__clock, scaled_time, self.__is_running)
+
+                if self._state != Runnable.State.RUNNING:
+                    break
+
+                now = self.__clock.elapsed_us()
+
+                batch = [step]
+                step = next(steps, None)
+                if self.__catch_up:
+                    while step is not None and (step[0] - origin) / speed <= now:
+                        batch.append(step)
+                        step = next(steps, None)
+
+                if len(batch) == 1:
+                    call(argument)
+                else:
+                    self._parse_batch([overdue[1] for overdue in batch])
+                    if debug:
+                        self.__logger.debug("Caught up on %d overdue events", len(batch))
+
+                for replayed in batch:
+                    late = now - (replayed[0] - origin) / speed
+                    lateness.record(late)
+                    self.__lateness_metric.record(late)
+                self.__events_metric.inc(len(batch))
+                self.__behind_metric.set(now - scaled_time)
+                if debug:
+                    self.__logger.debug("Event replayed with a drift of %.0f us", now - scaled_time)
+        finally:
+            close = getattr(steps, "close", None)
+            if close is not None:
+                close()
+
+        if lateness.get_count():
+            self.__logger.info(f"Replay run finished: {lateness}")
+
+        return True
+
+    def __halt(self):
+        """
+        Stop the controller from its own thread, which holds the condition.
+        """
+        self._state = Runnable.State.STOPPED
+        self._condition.notify_all()
 
     def _run(self):
         self.__logger.info("Output controller started")
 
+        reader = None
+
         with self._condition:
             while self._state == Runnable.State.RUNNING:
                 try:
-                    events = self.__ser.deserialize()
+                    if reader is None or reader.is_stale():
+                        if reader is not None:
+                            reader.close()
+                        reader = self.__ser.reader()
+
+                    replayed = self.__replay(reader)
                 except Exception as e:
                     self.__logger.error(f"Exception caught: {e}")
-                    return
-
-                with self._speed_lock:
-                    speed = self._speed
+                    self.__halt()
+                    break
 
-                start_time: int = datetime.now().timestamp() * 1_000
-
-                for event in events:
-                    scaled_time = event.timestamp / speed
-                    wait_time = max(0, scaled_time + start_time - int(datetime.now().timestamp() * 1_000)) / 1_000
-
-                    self.__logger.debug(f"For next event {event}, Waiting {wait_time} seconds (speed=x{speed})")
-
-                    self._condition.wait(timeout=wait_time)
-
-                    if self._state == Runnable.State.RUNNING:
-                        self._parse_event(event)
-                    else:
-                        break
+                if not replayed:
+                    self.__logger.warning("The recording has no event to replay, stopping")
+                    self.__halt()
+                    break
 
                 if self._state == Runnable.State.RUNNING:
                     timeout_between_runs: int = 0
                     self.__logger.info(f"Sleeping for {timeout_between_runs} seconds")
                     self._condition.wait_for(lambda: self._state == Runnable.State.STOPPED, timeout=timeout_between_runs)
 
+        if reader is not None:
+            reader.close()
+
         self.__logger.info("Output controller stopped")
\ No newline at end of file
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Set
+from typing import Callable, List, Set, Tuple
 
 from inputDevice.input_event import InputEvent, InputPayload, InputSource
 
@@ -26,4 +26,33 @@ class OutputHandler(ABC):
         Args:
             payload: The device-specific event to replay.
         """
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    def handle_batch(self, payloads: List[InputPayload]) -> None:
+        """
+        Replay several overdue payloads at once, in order. Called when the
+        replay fell behind; implementations may collapse payloads whose
+        effect is superseded by a later one.
+
+        Args:
+            payloads: The device-specific events to replay.
+        """
+        for payload in payloads:
+            self.handle_event(payload)
+
+    def compile(self, payloads: List[InputPayload]) -> List[Tuple[Callable[[object], None], object]]:
+        """
+        Pre-bind the replay of payloads that will be replayed in this order,
+        as one (call, argument) pair per payload. Implementations may resolve
+        once what handle_event would resolve on every replay, or leave out
+        work the previous payloads already did (e.g. moving the cursor
+        where it already is).
+
+        Args:
+            payloads: The device-specific events to compile, in replay order.
+
+        Returns:
+            List[Tuple[Callable[[object], None], object]]: Replaying payloads[i] is calls[i][0](calls[i][1]).
+        """
+        handle_event = self.handle_event
+        return [(handle_event, payload) for payload in payloads]
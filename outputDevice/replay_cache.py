@@ -0,0 +1,76 @@
+import logging
+from typing import Hashable, Iterable, Iterator, List, Optional
+
+from outputDevice.replay_plan import Step
+
+class ReplayCache:
+    """
+    Keeps the compiled replay steps of the last replayed script (see
+    ReplayPlan), so looping replays of an unchanged file start right away
+    without reading, decoding, transforming or compiling anything again.
+
+    Entries are keyed by whatever identifies the script and its version
+    (see EventReader.get_key: path, inode, size and modification time), so
+    a changed file simply misses the cache. Only one script is kept, and
+    only if it has at most max_events events, so memory stays bounded.
+
+    A cached step costs a few hundred bytes, far more than the mapped
+    recording it comes from, so the cache is disabled unless max_events
+    is set.
+
+    This class is not thread-safe.
+    """
+
+    def __init__(self, max_events: int = 0):
+        """
+        Args:
+            max_events (int): Largest script kept in memory, in events. 0 disables the cache.
+        """
+        self.__max_events = max_events
+        self.__key: Optional[Hashable] = None
+        self.__steps: Optional[List[Step]] = None
+        self.__logger = logging.getLogger("outputDevice.ReplayCache")
+
+    def get(self, key: Hashable) -> Optional[List[Step]]:
+        """
+        Get the cached steps of a script.
+
+        Returns:
+            Optional[List[Step]]: The steps, or None if they are not cached.
+        """
+        if self.__steps is not None and self.__key == key:
+            return self.__steps
+        return None
+
+    def record(self, key: Hashable, steps: Iterable[Step]) -> Iterator[Step]:
+        """
+        Pass steps through, caching them under key once they were all
+        consumed. An iteration stopped early, or longer than max_events,
+        caches nothing.
+
+        Args:
+            key: Identifies the script the steps come from.
+            steps: The replay steps, one per event.
+        """
+        self.__key, self.__steps = None, None
+
+        recorded: Optional[List[Step]] = [] if self.__max_events > 0 else None
+
+        steps = iter(steps)
+        try:
+            for step in steps:
+                if recorded is not None:
+                    if len(recorded) < self.__max_events:
+                        recorded.append(step)
+                    else:
+                        self.__logger.info(f"Script longer than {self.__max_events} events, not caching it")
+                        recorded = None
+                yield step
+        finally:
+            close = getattr(steps, "close", None)
+            if close is not None:
+                close()
+
+        if recorded is not None:
+            self.__key, self.__steps = key, recorded
+            self.__logger.info(f"Cached {len(recorded)} replay steps")
@@ -0,0 +1,72 @@
+import logging
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from inputDevice.input_event import InputEvent, InputSource
+from outputDevice.output_handler import OutputHandler
+from pipeline.pipeline import Stage
+
+# (timestamp, event, call, argument): replaying the event is call(argument)
+Step = Tuple[int, InputEvent, Callable[[object], None], object]
+
+class ReplayPlan(Stage):
+    """
+    Compiles a stream of InputEvents into replay steps, each with the
+    pre-bound call replaying its event (see OutputHandler.compile).
+
+    Handlers compile WINDOW events at a time, so the decisions they take
+    once per script (which pynput key, whether the cursor must be moved
+    before a click, ...) are not taken again for every event, and the
+    replay loop only has to wait and call.
+
+    A step is a single tuple, with the argument of its call inline, so
+    long cached scripts keep as few objects alive as possible for the
+    garbage collector to scan.
+
+    Events no handler supports are dropped with an error.
+    """
+
+    WINDOW = 256
+
+    def __init__(self, handlers_by_source: Dict[InputSource, OutputHandler]):
+        """
+        Args:
+            handlers_by_source: The handler replaying each source.
+        """
+        self.__handlers_by_source = handlers_by_source
+        self.__logger = logging.getLogger("outputDevice.ReplayPlan")
+
+    def process(self, items: Iterator[InputEvent]) -> Iterator[Step]:
+        items = iter(items)
+
+        while True:
+            window = list(islice(items, self.WINDOW))
+            if not window:
+                return
+
+            yield from self.__compile(window)
+
+    def __compile(self, events: List[InputEvent]) -> List[Step]:
+        """
+        Compile a window of events, giving each handler its own events in order.
+        """
+        indices: Dict[OutputHandler, List[int]] = {}
+
+        for i, event in enumerate(events):
+            source = event.payload.getSourceType()
+            handler = self.__handlers_by_source.get(source)
+
+            if handler is None:
+                self.__logger.error(f"No handler registered for source {source.name}, skipping event")
+                continue
+
+            indices.setdefault(handler, []).append(i)
+
+        steps: List[Optional[Step]] = [None] * len(events)
+        for handler, handled in indices.items():
+            compiled = handler.compile([events[i].payload for i in handled])
+            for i, (call, argument) in zip(handled, compiled):
+                event = events[i]
+                steps[i] = (event.timestamp, event, call, argument)
+
+        return [step for step in steps if step is not None]
@@ -0,0 +1,101 @@
+from abc import ABC, abstractmethod
+from threading import Condition
+from time import sleep
+from typing import Callable
+
+from metrics.metrics import Histogram
+from utils.clock.clock import Clock
+
+class Scheduler(ABC):
+    """
+    Strategy used by OutputController to wait until the deadline of the next
+    event. Deadlines are absolute times on the replay Clock, so lateness on
+    one event never accumulates onto the following ones.
+    """
+
+    @abstractmethod
+    def wait_until(self, condition: Condition, clock: Clock, deadline_us: float, is_running: Callable[[], bool]) -> None:
+        """
+        Block until the deadline is reached or the replay is stopped.
+
+        Args:
+            condition: The controller condition, held by the caller. Waiting on it
+                       lets stop() interrupt the wait.
+            clock: The replay clock the deadline is expressed on.
+            deadline_us: The deadline, in microseconds on the clock.
+            is_running: Returns False once the replay has been stopped.
+        """
+        raise NotImplementedError
+
+
+class ConditionScheduler(Scheduler):
+    """
+    Plain condition wait until the deadline. Uses no CPU while waiting, but
+    wakes up with the granularity of the OS timer (often 1-15 ms).
+    """
+
+    def wait_until(self, condition: Condition, clock: Clock, deadline_us: float, is_running: Callable[[], bool]) -> None:
+        wait_time = max(0, deadline_us - clock.elapsed_us()) / 1_000_000
+        condition.wait(timeout=wait_time)
+
+
+class HybridScheduler(Scheduler):
+    """
+    Sleeps on the condition until shortly before the deadline, then spins
+    until the deadline itself.
+
+    The scheduler learns how much the coarse sleep tends to overshoot and
+    wakes up that much earlier, so the spin phase keeps hitting the
+    deadline even when the OS timer is coarse.
+
+    spin_us is the CPU budget knob: the larger it is, the more CPU is burnt
+    per event and the more precise the replay; 0 disables spinning.
+    """
+
+    SMOOTHING = 0.1
+
+    def __init__(self, spin_us: int = 2_000):
+        """
+        Initialize the scheduler.
+
+        Args:
+            spin_us (int): How long before the deadline to stop sleeping and
+                           start spinning, in microseconds.
+        """
+        self.__spin_us = max(0, spin_us)
+        self.__oversleep_us: float = 0
+
+    def wait_until(self, condition: Condition, clock: Clock, deadline_us: float, is_running: Callable[[], bool]) -> None:
+        wake_us = deadline_us - self.__spin_us - self.__oversleep_us
+        remaining = wake_us - clock.elapsed_us()
+
+        if remaining > 0:
+            condition.wait(timeout=remaining / 1_000_000)
+            overshoot = clock.elapsed_us() - wake_us
+            self.__oversleep_us += self.SMOOTHING * (max(0, overshoot) - self.__oversleep_us)
+
+        if clock.elapsed_us() >= deadline_us:
+            return
+
+        # Spin without holding the condition so stop() is never held back
+        condition.release()
+        try:
+            while is_running() and clock.elapsed_us() < deadline_us:
+                # Give the other threads a chance to run while spinning
+                sleep(0)
+        finally:
+            condition.acquire()
+
+
+class LatenessHistogram(Histogram):
+    """
+    Histogram of replay lateness (actual minus scheduled time), in
+    microseconds.
+
+    Bucket 0 holds events on time or early, bucket n holds lateness in
+    [2^(n-1), 2^n) microseconds.
+    """
+
+    def __repr__(self) -> str:
+        return (f"LatenessHistogram(count={self.get_count()}, mean={self.get_mean():.0f}us, "
+                f"p50={self.get_percentile(50)}us, p99={self.get_percentile(99)}us, max={self.get_max()}us)")
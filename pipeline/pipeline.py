@@ -0,0 +1,253 @@
+import logging
+from abc import ABC, abstractmethod
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from time import perf_counter
+from typing import Iterable, Iterator, List
+
+from utils.thread.thread import Runnable
+
+class Stage(ABC):
+    """
+    One step of a Pipeline: consumes a stream of items and produces another.
+
+    Stages are generators chained together, so items flow one at a time
+    and nothing forces a whole session to be loaded in memory.
+    """
+
+    @abstractmethod
+    def process(self, items: Iterator) -> Iterator:
+        """
+        Transform a stream of items.
+
+        Args:
+            items: The upstream items.
+
+        Returns:
+            Iterator: The downstream items.
+        """
+        raise NotImplementedError
+
+
+class Pipeline:
+    """
+    Chain of Stages applied, in order, to a source iterable.
+
+    Without a Buffered stage everything runs lazily on the consuming
+    thread. A Buffered stage moves everything upstream of it to a
+    background thread connected through a bounded queue, which gives
+    backpressure: a fast producer blocks once the queue is full instead of
+    buffering without bound.
+    """
+
+    def __init__(self, stages: List[Stage]):
+        """
+        Args:
+            stages: The stages, from upstream to downstream.
+        """
+        self.__stages = stages
+
+    def run(self, source: Iterable) -> Iterator:
+        """
+        Stream a source through every stage.
+
+        Args:
+            source: The items entering the pipeline.
+
+        Returns:
+            Iterator: The items leaving the last stage.
+        """
+        stream = iter(source)
+        for stage in self.__stages:
+            stream = stage.process(stream)
+        return stream
+
+
+class _End:
+    """
+    Marks the end of a stream in a queue, optionally carrying the error
+    that ended it.
+    """
+
+    def __init__(self, error: BaseException = None):
+        self.error = error
+
+
+class Buffered(Stage):
+    """
+    Runs the upstream stages on a background thread and hands their items
+    over through a bounded queue.
+
+    Backpressure is measured on both ends: the time the producer spent
+    blocked on a full queue and the time the consumer spent waiting on an
+    empty one.
+    """
+
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, maxsize: int = 64):
+        """
+        Args:
+            maxsize (int): Maximum number of items waiting in the queue.
+        """
+        self.__maxsize = maxsize
+        self.__blocked = 0.0
+        self.__starved = 0.0
+        self.__logger = logging.getLogger("pipeline.Buffered")
+
+    def get_blocked_time(self) -> float:
+        """
+        Get the time, in seconds, the producer spent blocked on a full queue.
+        """
+        return self.__blocked
+
+    def get_starved_time(self) -> float:
+        """
+        Get the time, in seconds, the consumer spent waiting on an empty queue.
+        """
+        return self.__starved
+
+    def process(self, items: Iterator) -> Iterator:
+        queue = Queue(self.__maxsize)
+        stopped = Event()
+
+        def put(item) -> bool:
+            try:
+                queue.put_nowait(item)
+                return True
+            except Full:
+                pass
+
+            start = perf_counter()
+            try:
+                while not stopped.is_set():
+                    try:
+                        queue.put(item, timeout=self.POLL_INTERVAL)
+                        return True
+                    except Full:
+                        pass
+                return False
+            finally:
+                self.__blocked += perf_counter() - start
+
+        def produce():
+            end = _End()
+            try:
+                for item in items:
+                    if not put(item):
+                        return
+            except BaseException as e:
+                end = _End(e)
+            finally:
+                close = getattr(items, "close", None)
+                if close is not None:
+                    close()
+            put(end)
+
+        thread = Thread(target=produce, name="pipeline.Buffered", daemon=True)
+        thread.start()
+
+        try:
+            while True:
+                try:
+                    item = queue.get_nowait()
+                except Empty:
+                    start = perf_counter()
+                    item = queue.get()
+                    self.__starved += perf_counter() - start
+
+                if isinstance(item, _End):
+                    if item.error is not None:
+                        raise item.error
+                    return
+
+                yield item
+        finally:
+            stopped.set()
+            thread.join()
+            self.__logger.debug(f"Producer blocked {self.__blocked:.3f}s, consumer starved {self.__starved:.3f}s")
+
+
+class PipelineSink(Runnable):
+    """
+    Drop-in replacement for a Serialize (start, stop, schedule_serialization)
+    that streams every scheduled batch through a Pipeline on its own thread
+    before handing the result to another sink.
+
+    This is how an InputRecorder feeds a record -> transform -> disk chain:
+
+        InputRecorder(sources, PipelineSink(Pipeline([...]), ser))
+
+    The queue between the recorder and the pipeline is bounded, so when the
+    pipeline falls behind schedule_serialization refuses batches, or blocks
+    the recorder thread when asked to wait (never the listener threads,
+    which only write to their ring buffers).
+    """
+
+    def __init__(self, pipeline: Pipeline, sink, queue_size: int = 16):
+        """
+        Args:
+            pipeline: The stages every batch goes through.
+            sink: Where the batches leaving the pipeline are scheduled, e.g. a Serialize.
+            queue_size: Maximum number of batches waiting for the pipeline.
+        """
+        super().__init__()
+        self.__pipeline = pipeline
+        self.__sink = sink
+        self.__queue = Queue(queue_size)
+        self.__logger = logging.getLogger("pipeline.PipelineSink")
+
+    def schedule_serialization(self, batch, wait: bool = False) -> bool:
+        """
+        Queue a batch for the pipeline.
+
+        Args:
+            batch: The batch to be streamed through the pipeline.
+            wait: Wait for room when the queue is full instead of refusing the batch.
+
+        Returns:
+            bool: False if the batch was not queued because the queue was full.
+        """
+        if not batch:
+            return True
+
+        if wait:
+            self.__queue.put(batch)
+            return True
+
+        try:
+            self.__queue.put_nowait(batch)
+        except Full:
+            return False
+        return True
+
+    def stop(self):
+        """
+        Let the pipeline finish the queued batches, then stop it.
+        """
+        if self._state == Runnable.State.RUNNING:
+            self.__queue.put(_End())
+        super().stop()
+
+    def __batches(self) -> Iterator:
+        while True:
+            batch = self.__queue.get()
+            if isinstance(batch, _End):
+                return
+            yield batch
+
+    def _run(self):
+        self.__logger.info("Pipeline sink started")
+        self.__sink.start()
+
+        try:
+            for batch in self.__pipeline.run(self.__batches()):
+                self.__sink.schedule_serialization(batch, wait=True)
+        except Exception as e:
+            self.__logger.error(f"Exception caught: {e}")
+            # Keep consuming so the recorder never blocks on a full queue
+            for _ in self.__batches():
+                pass
+
+        self.__sink.stop()
+        self.__logger.info("Pipeline sink stopped")
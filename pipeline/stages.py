@@ -0,0 +1,125 @@
+from itertools import islice
+from typing import Callable, Iterator
+
+from inputDevice.event_buffer import EventBuffer
+from inputDevice.input_event import InputEvent
+from mouse.mouse_simplifier import MoveSimplifier
+from pipeline.pipeline import Buffered, Stage
+
+class Filter(Stage):
+    """
+    Keeps only the items matching a predicate.
+    """
+
+    def __init__(self, predicate: Callable[[object], bool]):
+        self.__predicate = predicate
+
+    def process(self, items: Iterator) -> Iterator:
+        for item in items:
+            if self.__predicate(item):
+                yield item
+
+
+class Map(Stage):
+    """
+    Replaces every item with the result of a function.
+    """
+
+    def __init__(self, function: Callable[[object], object]):
+        self.__function = function
+
+    def process(self, items: Iterator) -> Iterator:
+        for item in items:
+            yield self.__function(item)
+
+
+class TimeScale(Stage):
+    """
+    Speeds up (factor > 1) or slows down (factor < 1) a stream of InputEvents
+    by rescaling their timestamps. The events are copied, never modified,
+    since they may be shared (e.g. by a ReplayCache or an EventReader).
+    """
+
+    def __init__(self, factor: float):
+        if factor <= 0:
+            raise ValueError("The time scale factor must be positive")
+        self.__factor = factor
+
+    def process(self, items: Iterator[InputEvent]) -> Iterator[InputEvent]:
+        for event in items:
+            yield InputEvent(event.payload, int(event.timestamp / self.__factor), event_id=event.id)
+
+
+class Decimate(Stage):
+    """
+    Simplifies the mouse moves of a stream of EventBuffers, see MoveSimplifier.
+    """
+
+    def __init__(self, simplifier: MoveSimplifier):
+        self.__simplifier = simplifier
+
+    def process(self, items: Iterator[EventBuffer]) -> Iterator[EventBuffer]:
+        for buffer in items:
+            yield self.__simplifier.simplify(buffer)
+
+
+class Split(Stage):
+    """
+    Passes every item through unchanged and also hands it to side sinks
+    (e.g. a Serialize.schedule_serialization to keep a copy on disk).
+    """
+
+    def __init__(self, *sinks: Callable[[object], None]):
+        self.__sinks = sinks
+
+    def process(self, items: Iterator) -> Iterator:
+        for item in items:
+            for sink in self.__sinks:
+                sink(item)
+            yield item
+
+
+class Prefetch(Buffered):
+    """
+    Buffered stage handing items over in windows instead of one by one.
+
+    Everything upstream (reading, decompressing, decoding) runs on the
+    background thread, which keeps up to `windows` windows of `window`
+    ready items queued, so the consuming thread only ever pops decoded
+    items and pays one queue hand-over per window. Windows start at
+    FIRST_WINDOW items and double up to `window`, so the first items are
+    available right away.
+    """
+
+    FIRST_WINDOW = 8
+
+    def __init__(self, window: int = 256, windows: int = 4):
+        """
+        Args:
+            window (int): Number of items per window.
+            windows (int): Maximum number of windows waiting in the queue.
+        """
+        super().__init__(windows)
+        self.__window = max(1, window)
+
+    def process(self, items: Iterator) -> Iterator:
+        chunks = super().process(self.__chunk(iter(items)))
+        try:
+            for chunk in chunks:
+                yield from chunk
+        finally:
+            chunks.close()
+
+    def __chunk(self, items: Iterator) -> Iterator[list]:
+        size = min(self.FIRST_WINDOW, self.__window)
+        try:
+            while True:
+                chunk = list(islice(items, size))
+                if not chunk:
+                    return
+                yield chunk
+                size = min(size * 2, self.__window)
+        finally:
+            close = getattr(items, "close", None)
+            if close is not None:
+                close()
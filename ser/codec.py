@@ -0,0 +1,482 @@
+"""
+On-disk layout of an event log.
+
+The file starts with a small header (magic + format version) followed by
+any number of self-delimiting frames. Each frame holds one batch handed to
+Serialize and is written with a single append:
+
+    [length: uint32][crc32: uint32][payload: length bytes]
+
+A process killed mid-write (e.g. the F12 emergency stop) can only leave a
+partial frame at the tail of the file; readers detect it through the
+length/crc check and stop there, so every frame before it stays readable.
+
+Version 1 frames hold a pickled list of InputEvents. Version 2 to 4 frames
+hold the batch as fixed-width little-endian columns:
+
+    [count: uint32][first timestamp: int64][key count: uint16]
+    key table: key count x ([length: uint16][utf-8 bytes])
+    delta   int32[count]   timestamp minus the previous event's (0 for the first)
+    x       int32[count]
+    y       int32[count]
+    key     uint16[count]  1-based index in the key table, 0 when unused
+    source  uint8[count]   InputSource value
+    type    uint8[count]   payload EventType value
+
+Timestamps are in microseconds since version 3 and in milliseconds before;
+every reader converts them to microseconds. A frame holds at most
+FRAME_EVENTS events, so the first timestamps of the frames form a sparse
+time index of the recording.
+
+That index is also kept next to the file, in the same path suffixed with
+INDEX_SUFFIX, one entry per frame appended along with the frame:
+
+    [first timestamp: int64][payload offset: uint64][length: uint32][crc32: uint32]
+
+It lets a reader locate every frame without touching the file pages, and
+seek to a timestamp by bisecting it. The index is only a cache: a missing
+or partial one is rebuilt, or completed, from the frame headers.
+
+Since version 4, columnar frames can be compressed, as flagged in the file
+header (earlier readers ignored the flags, so older versions must not set
+any): with FLAG_ZLIB the batch header stays raw (so the time index still reads it
+without decompressing anything) and the rest of the payload is a zlib
+stream. Every frame is compressed on its own, so any frame can be
+decompressed without the others.
+
+Files that do not start with the magic are legacy pickles (a single list).
+"""
+
+import pickle
+import struct
+import sys
+import zlib
+from array import array
+from operator import sub
+from typing import Iterator, List, Optional, Tuple
+
+from inputDevice.event_buffer import EventBuffer
+from inputDevice.input_event import InputEvent, InputSource
+from keyboard.keyboard_event import KeyboardEvent
+from mouse.mouse_event import MouseEvent
+
+MAGIC = b"BEVT"
+VERSION = 4
+
+COLUMNAR_VERSIONS = (2, 3, 4)
+TIMESTAMP_SCALE = {1: 1_000, 2: 1_000, 3: 1, 4: 1}
+
+HEADER = struct.Struct("<4sHH")
+FLAG_ZLIB = 0x1
+KNOWN_FLAGS = FLAG_ZLIB
+FLAGS_VERSION = 4
+ZLIB_LEVEL = 1
+
+FRAME = struct.Struct("<II")
+
+BATCH = struct.Struct("<IqH")
+KEY = struct.Struct("<H")
+COLUMNS = ("i", "i", "i", "H", "B", "B")
+FRAME_EVENTS = 4096
+
+INDEX_SUFFIX = ".idx"
+INDEX_ENTRY = struct.Struct("<qQII")
+
+DELTA_MIN = -(1 << 31)
+DELTA_MAX = (1 << 31) - 1
+
+PAYLOAD_TYPES = {
+    InputSource.MOUSE: MouseEvent,
+    InputSource.KEYBOARD: KeyboardEvent,
+}
+
+_DECODERS = {source.value: payload_type.from_record for source, payload_type in PAYLOAD_TYPES.items()}
+
+
+class FormatError(Exception):
+    """
+    Raised when a file does not look like an event log at all.
+    """
+    pass
+
+
+def encode_header(version: int = VERSION, flags: int = 0) -> bytes:
+    """
+    Build the file header.
+
+    Args:
+        version: The format version stored in the header.
+        flags: The FLAG_* options the frames are written with.
+    """
+    return HEADER.pack(MAGIC, version, flags)
+
+
+def decode_header(buffer) -> Tuple[int, int]:
+    """
+    Parse the file header.
+
+    Args:
+        buffer: A bytes-like object starting at the beginning of the file.
+
+    Returns:
+        Tuple[int, int]: The format version and flags.
+
+    Raises:
+        FormatError: If the buffer does not start with a valid header, or
+                     with flags its version cannot have.
+    """
+    if len(buffer) < HEADER.size:
+        raise FormatError("File too short to contain a header")
+
+    magic, version, flags = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise FormatError(f"Bad magic {bytes(magic)!r}")
+    if flags & ~KNOWN_FLAGS:
+        raise FormatError(f"Unsupported flags {flags:#x}")
+    if flags and version < FLAGS_VERSION:
+        raise FormatError(f"Flags {flags:#x} are not supported by format version {version}")
+
+    return version, flags
+
+
+def is_event_log(buffer) -> bool:
+    """
+    Check whether a buffer starts with the event log magic.
+    """
+    return len(buffer) >= len(MAGIC) and bytes(buffer[:len(MAGIC)]) == MAGIC
+
+
+def encode_frame(payload: bytes) -> bytes:
+    """
+    Wrap a payload in a length + crc32 frame.
+    """
+    return FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def scan_frames(buffer, offset: int = HEADER.size) -> List[Tuple[int, int, int]]:
+    """
+    Locate the complete frames of a buffer without reading their payloads.
+
+    Only the frame headers are touched, so this stays cheap on a memory map
+    of a large file. Checksums are not verified, see check_frame.
+
+    Args:
+        buffer: A bytes-like object holding the whole file.
+        offset: Where the first frame starts.
+
+    Returns:
+        List[Tuple[int, int, int]]: The payload offset, length and crc32 of each frame.
+    """
+    frames = []
+    end = len(buffer)
+
+    while offset + FRAME.size <= end:
+        length, crc = FRAME.unpack_from(buffer, offset)
+        start = offset + FRAME.size
+        if start + length > end:
+            break
+
+        frames.append((start, length, crc))
+        offset = start + length
+
+    return frames
+
+
+def check_frame(payload, crc: int) -> bool:
+    """
+    Verify the checksum of a frame payload located by scan_frames.
+    """
+    return zlib.crc32(payload) == crc
+
+
+def iter_frames(buffer, offset: int = HEADER.size) -> Iterator[Tuple[int, memoryview]]:
+    """
+    Iterate over the complete, valid frames of a buffer.
+
+    Iteration stops at the first truncated or corrupted frame; anything
+    after it is considered a lost tail.
+
+    Args:
+        buffer: A bytes-like object holding the whole file.
+        offset: Where the first frame starts.
+
+    Yields:
+        Tuple[int, memoryview]: The offset of the frame and a view over its payload.
+    """
+    view = memoryview(buffer)
+    end = len(view)
+
+    while offset + FRAME.size <= end:
+        length, crc = FRAME.unpack_from(view, offset)
+        start = offset + FRAME.size
+        if start + length > end:
+            return
+
+        payload = view[start:start + length]
+        if zlib.crc32(payload) != crc:
+            return
+
+        yield offset, payload
+        offset = start + length
+
+
+
+def _little_endian(column) -> bytes:
+    """
+    Get the little-endian bytes of a column.
+    """
+    if sys.byteorder == "big":
+        column = array(column.format if isinstance(column, memoryview) else column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _encode_range(buffer: EventBuffer, deltas: array, start: int, end: int, flags: int) -> bytes:
+    """
+    Encode the events [start, end) of a buffer as a single frame.
+    """
+    timestamps, sources, types, x, y, keys = buffer.get_columns()
+    key_table = buffer.get_key_table()
+
+    parts = [BATCH.pack(end - start, timestamps[start], len(key_table) - 1)]
+
+    for key in key_table[1:]:
+        data = key.encode("utf-8")
+        parts.append(KEY.pack(len(data)))
+        parts.append(data)
+
+    frame_deltas = array("i", [0]) + array("i", deltas[start + 1:end])
+
+    for column in (frame_deltas, x[start:end], y[start:end], keys[start:end], sources[start:end], types[start:end]):
+        parts.append(_little_endian(column))
+
+    if flags & FLAG_ZLIB:
+        parts = [parts[0], zlib.compress(b"".join(parts[1:]), ZLIB_LEVEL)]
+
+    return encode_frame(b"".join(parts))
+
+
+def encode_buffer(buffer: EventBuffer, flags: int = 0) -> bytes:
+    """
+    Encode an EventBuffer as columnar frames.
+
+    The buffer columns are written as they are, split every FRAME_EVENTS
+    events and wherever a timestamp delta would overflow its column.
+
+    Args:
+        buffer: The events to encode, in timestamp order.
+        flags: The FLAG_* options of the file the frames are appended to.
+
+    Returns:
+        bytes: The frames, ready to be appended to the file.
+    """
+    if len(buffer) == 0:
+        return b""
+
+    timestamps = buffer.get_columns()[0]
+    deltas = array("q", [0])
+    deltas.extend(map(sub, timestamps[1:], timestamps[:-1]))
+
+    splits = set(range(0, len(buffer), FRAME_EVENTS))
+    if min(deltas) < DELTA_MIN or max(deltas) > DELTA_MAX:
+        splits.update(i for i, delta in enumerate(deltas) if delta < DELTA_MIN or delta > DELTA_MAX)
+    splits = sorted(splits) + [len(buffer)]
+
+    return b"".join(_encode_range(buffer, deltas, start, end, flags) for start, end in zip(splits, splits[1:]) if end > start)
+
+
+def encode_index(frames, offset: int) -> bytes:
+    """
+    Build the index entries of columnar frames about to be appended.
+
+    Args:
+        frames: A bytes-like object holding the frames, as returned by encode_buffer.
+        offset: The position of the frames in the file.
+
+    Returns:
+        bytes: The entries, ready to be appended to the index file.
+    """
+    return b"".join(
+        INDEX_ENTRY.pack(BATCH.unpack_from(frames, start)[1], offset + start, length, crc)
+        for start, length, crc in scan_frames(frames, 0)
+    )
+
+
+def decode_index(data) -> List[Tuple[int, int, int, int]]:
+    """
+    Parse an index file, ignoring a partial trailing entry.
+
+    Returns:
+        List[Tuple[int, int, int, int]]: The first timestamp (in file units),
+        payload offset, length and crc32 of each frame.
+    """
+    return list(INDEX_ENTRY.iter_unpack(memoryview(data)[:len(data) - len(data) % INDEX_ENTRY.size]))
+
+
+def build_index(buffer, offset: int = HEADER.size) -> List[Tuple[int, int, int, int]]:
+    """
+    Build the index of the columnar frames of a buffer from their headers,
+    see decode_index. Reads one page per frame.
+    """
+    return [(BATCH.unpack_from(buffer, start)[1], start, length, crc) for start, length, crc in scan_frames(buffer, offset)]
+
+
+def encode_events(events: List[InputEvent], flags: int = 0) -> bytes:
+    """
+    Encode a list of InputEvents as columnar frames, see encode_buffer.
+    """
+    buffer = EventBuffer(len(events))
+    for event in events:
+        event_type, x, y, key = event.payload.to_record()
+        buffer.append(event.timestamp, event.payload.getSourceType().value, event_type, x, y, key)
+
+    return encode_buffer(buffer, flags)
+
+
+def decompress_frame(payload, flags: int):
+    """
+    Get the plain columnar payload of a frame.
+
+    Args:
+        payload: A bytes-like object holding one frame payload, as stored.
+        flags: The FLAG_* options of the file.
+
+    Returns:
+        The payload itself when the file is not compressed, else new bytes.
+    """
+    if not flags & FLAG_ZLIB:
+        return payload
+
+    with memoryview(payload) as view:
+        return bytes(view[:BATCH.size]) + zlib.decompress(view[BATCH.size:])
+
+
+def decode_columns(payload) -> Tuple[int, List[Optional[str]], list]:
+    """
+    Split a columnar frame payload into its columns.
+
+    On little-endian hosts the columns are zero-copy memoryviews over the
+    payload, so decoding a frame does not copy it. Release them once done
+    when the payload is backed by a memory map.
+
+    Args:
+        payload: A bytes-like object holding one frame payload.
+
+    Returns:
+        Tuple[int, List[Optional[str]], list]: The timestamp of the first
+        event, the key table (index 0 is None) and the columns in COLUMNS order.
+    """
+    view = memoryview(payload)
+    count, first_timestamp, key_count = BATCH.unpack_from(view, 0)
+    offset = BATCH.size
+
+    keys = [None]
+    for _ in range(key_count):
+        (length,) = KEY.unpack_from(view, offset)
+        offset += KEY.size
+        keys.append(bytes(view[offset:offset + length]).decode("utf-8"))
+        offset += length
+
+    columns = []
+    for typecode in COLUMNS:
+        size = struct.calcsize(typecode) * count
+        if sys.byteorder == "little":
+            column = view[offset:offset + size].cast(typecode)
+        else:
+            column = array(typecode)
+            column.frombytes(view[offset:offset + size])
+            column.byteswap()
+        columns.append(column)
+        offset += size
+
+    return first_timestamp, keys, columns
+
+
+def iter_events(payload, scale: int = 1, start: Optional[int] = None, end: Optional[int] = None) -> Iterator[InputEvent]:
+    """
+    Lazily decode a columnar frame payload, one InputEvent at a time.
+
+    Only the event being yielded is materialized, the rest of the frame is
+    read straight from the payload. Events outside [start, end) are skipped
+    without being materialized.
+
+    Args:
+        payload: A bytes-like object holding one frame payload.
+        scale: Factor converting the stored timestamps to microseconds,
+               see TIMESTAMP_SCALE.
+        start: Timestamp, in microseconds, of the first event to yield.
+        end: Timestamp, in microseconds, the iteration stops at.
+    """
+    first_timestamp, keys, columns = decode_columns(payload)
+    delta, x, y, key, source, event_type = columns
+
+    try:
+        timestamp = first_timestamp
+        first = 0
+
+        if start is not None:
+            while first < len(delta) and (timestamp + delta[first]) * scale < start:
+                timestamp += delta[first]
+                first += 1
+
+        for i in range(first, len(delta)):
+            timestamp += delta[i]
+            if end is not None and timestamp * scale >= end:
+                return
+            yield InputEvent(_DECODERS[source[i]](event_type[i], x[i], y[i], keys[key[i]]), timestamp * scale)
+    finally:
+        for column in columns:
+            if isinstance(column, memoryview):
+                column.release()
+
+
+def decode_events(payload, scale: int = 1) -> List[InputEvent]:
+    """
+    Decode a columnar frame payload into InputEvents, see iter_events.
+    """
+    return list(iter_events(payload, scale))
+
+
+def load(data) -> Tuple[List[InputEvent], int]:
+    """
+    Load every event of a file, whatever its format version. Timestamps
+    are always returned in microseconds.
+
+    Args:
+        data: A bytes-like object holding the whole file.
+
+    Returns:
+        Tuple[List[InputEvent], int]: The events and the number of trailing
+        bytes that were ignored because they were truncated or corrupted.
+
+    Raises:
+        FormatError: If the file uses an unknown format version.
+    """
+    if not is_event_log(data):
+        return _scale(pickle.loads(data), TIMESTAMP_SCALE[1]), 0
+
+    version, flags = decode_header(data)
+    if version not in TIMESTAMP_SCALE:
+        raise FormatError(f"Unsupported format version {version}")
+
+    scale = TIMESTAMP_SCALE[version]
+
+    events = []
+    end = HEADER.size
+    for offset, payload in iter_frames(data):
+        if version in COLUMNAR_VERSIONS:
+            events.extend(decode_events(decompress_frame(payload, flags), scale))
+        else:
+            events.extend(_scale(pickle.loads(payload), scale))
+        end = offset + FRAME.size + len(payload)
+
+    return events, len(data) - end
+
+
+def _scale(events: List[InputEvent], scale: int) -> List[InputEvent]:
+    """
+    Convert the timestamps of unpickled events to microseconds, in place.
+    """
+    for event in events:
+        event.timestamp *= scale
+    return events
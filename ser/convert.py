@@ -0,0 +1,53 @@
+import argparse
+import logging
+
+from ser import codec
+
+def convert(source: str, destination: str, compress: bool = False) -> int:
+    """
+    Convert a recording in any older format (a single pickled list or a
+    version 1 framed pickle log) to the current columnar format.
+
+    Args:
+        source: Path of the recording to convert.
+        destination: Path the converted recording is written to.
+        compress: Compress the frames of the converted recording.
+
+    Returns:
+        int: The number of converted events.
+    """
+    logger = logging.getLogger("ser.convert")
+
+    with open(source, "rb") as file:
+        data = file.read()
+
+    events, ignored = codec.load(data)
+    if ignored:
+        logger.warning(f"Ignoring {ignored} bytes of truncated or corrupted data at the end of {source}")
+
+    flags = codec.FLAG_ZLIB if compress else 0
+    frames = codec.encode_events(events, flags)
+    with open(destination, "wb") as file:
+        file.write(codec.encode_header(flags=flags) + frames)
+
+    with open(destination + codec.INDEX_SUFFIX, "wb") as file:
+        file.write(codec.encode_index(frames, codec.HEADER.size))
+
+    logger.info(f"Converted {len(events)} events from {source} to {destination}")
+    return len(events)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Convert a legacy recording to the current event log format"
+    )
+    parser.add_argument("source", type=str, help="Recording to convert (e.g. input_events.pkl)")
+    parser.add_argument("destination", type=str, help="Path of the converted recording")
+    parser.add_argument("--compress", action="store_true", help="Compress the converted recording")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args()
+    convert(args.source, args.destination, args.compress)
@@ -0,0 +1,225 @@
+import logging
+import mmap
+import os
+from bisect import bisect_left
+from typing import Iterator, List, Optional, Tuple
+
+from inputDevice.input_event import InputEvent
+from pipeline.pipeline import Buffered
+from ser import codec
+
+class EventReader:
+    """
+    Memory-mapped, read-only view over a recording.
+
+    Opening the reader maps the file and locates its frames by reading the
+    frame headers only. Iterating decodes one frame at a time straight from
+    the mapping and yields its events lazily, so replay starts right away
+    and memory stays flat regardless of the size of the recording. The same
+    reader can be iterated any number of times without re-parsing the file.
+
+    The frames are located through the index file kept next to the
+    recording (see ser.codec), so seek() and range() bisect it and only
+    touch the pages of the frames they actually read.
+
+    Compressed recordings are decompressed one frame at a time, on a
+    background thread that stays DECOMPRESS_AHEAD frames ahead of the
+    events being yielded.
+
+    Pickled recordings (format version 1 and older) are not mapped; they are
+    fully loaded once and kept in memory instead (see ser.convert).
+    """
+
+    DECOMPRESS_AHEAD = 2
+
+    def __init__(self, file: str, allow_pickle: bool = True):
+        """
+        Open and map a recording.
+
+        Args:
+            file (str): The path of the recording.
+            allow_pickle (bool): Whether pickled recordings may be loaded. Only
+                                 enable it for trusted files, unpickling can
+                                 run arbitrary code.
+
+        Raises:
+            OSError: If the file cannot be opened.
+            codec.FormatError: If the file uses an unknown format version, or
+                               is pickled and allow_pickle is False.
+        """
+        self.__file = file
+        self.__logger = logging.getLogger("ser.EventReader")
+
+        self.__map: Optional[mmap.mmap] = None
+        self.__frames: List[Tuple[int, int, int]] = []
+        self.__first_timestamps: List[int] = []
+        self.__events: Optional[List[InputEvent]] = None
+        self.__scale: int = 1
+        self.__flags: int = 0
+
+        with open(self.__file, "rb") as file:
+            self.__stat = os.fstat(file.fileno())
+            if self.__stat.st_size > 0:
+                self.__map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.__map is None:
+            self.__logger.warning(f"{self.__file} is empty")
+        elif codec.is_event_log(self.__map) and codec.decode_header(self.__map)[0] in codec.COLUMNAR_VERSIONS:
+            version, self.__flags = codec.decode_header(self.__map)
+            self.__scale = codec.TIMESTAMP_SCALE[version]
+            index = self.__load_index()
+            self.__frames = [(start, length, crc) for _, start, length, crc in index]
+            self.__first_timestamps = [timestamp * self.__scale for timestamp, _, _, _ in index]
+            self.__logger.info(f"Mapped {len(self.__frames)} frames from {self.__file}")
+        elif not allow_pickle:
+            self.close()
+            raise codec.FormatError(f"{self.__file} is not a columnar event log")
+        else:
+            self.__logger.warning(f"{self.__file} is a pickled recording, loading it in memory")
+            self.__events, ignored = codec.load(self.__map)
+            if ignored:
+                self.__logger.warning(f"Ignoring {ignored} bytes of truncated or corrupted data at the end of the file")
+            self.close()
+
+    def __load_index(self) -> List[Tuple[int, int, int, int]]:
+        """
+        Read the index file, rebuilding the part it does not cover (or all
+        of it, if it does not match the recording) from the frame headers.
+        """
+        try:
+            with open(self.__file + codec.INDEX_SUFFIX, "rb") as file:
+                index = codec.decode_index(file.read())
+        except OSError:
+            index = []
+
+        if index and not self.__index_matches(index):
+            self.__logger.warning(f"Index of {self.__file} does not match the recording, rebuilding it")
+            index = []
+
+        end = index[-1][1] + index[-1][2] if index else codec.HEADER.size
+        if end < len(self.__map):
+            index.extend(codec.build_index(self.__map, end))
+
+        return index
+
+    def __index_matches(self, index: List[Tuple[int, int, int, int]]) -> bool:
+        """
+        Check that index entries chain up from the header and that the last
+        one points at a real frame, which only reads the last frame header.
+        """
+        offset = codec.HEADER.size
+        for _, start, length, _ in index:
+            if start != offset + codec.FRAME.size:
+                return False
+            offset = start + length
+
+        _, start, length, crc = index[-1]
+        if offset > len(self.__map):
+            return False
+
+        return codec.FRAME.unpack_from(self.__map, start - codec.FRAME.size) == (length, crc)
+
+    def get_key(self) -> Tuple[str, int, int, int]:
+        """
+        Get what identifies this version of the recording: its path, inode,
+        size and modification time when it was opened.
+        """
+        return os.path.abspath(self.__file), self.__stat.st_ino, self.__stat.st_size, self.__stat.st_mtime_ns
+
+    def is_stale(self) -> bool:
+        """
+        Check whether the file changed on disk since it was opened.
+
+        Returns:
+            bool: True if the file was modified, replaced or removed.
+        """
+        try:
+            stat = os.stat(self.__file)
+        except OSError:
+            return True
+
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns) != \
+            (self.__stat.st_ino, self.__stat.st_size, self.__stat.st_mtime_ns)
+
+    def close(self):
+        """
+        Unmap the file. Iterations still in progress must be finished or
+        discarded first.
+        """
+        if self.__map is not None:
+            try:
+                self.__map.close()
+            except BufferError:
+                self.__logger.warning("Reader closed while still iterating, leaving the mapping to the garbage collector")
+            self.__map = None
+
+    def __iter__(self) -> Iterator[InputEvent]:
+        """
+        Iterate over every event of the recording, in order.
+
+        A frame that fails its checksum ends the iteration, the events
+        before it are still yielded.
+        """
+        return self.range()
+
+    def seek(self, timestamp: int) -> Iterator[InputEvent]:
+        """
+        Iterate over the events from the first one at or after a timestamp.
+
+        Args:
+            timestamp (int): The timestamp to start at, in microseconds.
+        """
+        return self.range(timestamp)
+
+    def range(self, start: Optional[int] = None, end: Optional[int] = None) -> Iterator[InputEvent]:
+        """
+        Iterate over the events timestamped in [start, end), in order.
+
+        The first frame is found by bisecting the index, and events of that
+        frame before start are skipped without being decoded.
+
+        Args:
+            start (Optional[int]): The first timestamp, in microseconds. None to start at the beginning.
+            end (Optional[int]): The timestamp to stop at, in microseconds. None to go to the end.
+        """
+        if self.__events is not None:
+            for event in self.__events:
+                if end is not None and event.timestamp >= end:
+                    return
+                if start is None or event.timestamp >= start:
+                    yield event
+            return
+
+        first = 0 if start is None else max(0, bisect_left(self.__first_timestamps, start) - 1)
+
+        payloads = self.__payloads(first, end)
+        if self.__flags & codec.FLAG_ZLIB:
+            payloads = Buffered(self.DECOMPRESS_AHEAD).process(payloads)
+
+        try:
+            for payload in payloads:
+                yield from codec.iter_events(payload, self.__scale, start, end)
+        finally:
+            payloads.close()
+
+    def __payloads(self, first: int, end: Optional[int]) -> Iterator:
+        """
+        Yield the plain payload of each frame from the first one, until the
+        frame starting at or after end.
+
+        Uncompressed payloads are views over the mapping, only valid until
+        the next one is requested.
+        """
+        for i in range(first, len(self.__frames)):
+            if self.__map is None:
+                return
+            if end is not None and self.__first_timestamps[i] >= end:
+                return
+
+            offset, length, crc = self.__frames[i]
+            with memoryview(self.__map)[offset:offset + length] as payload:
+                if not codec.check_frame(payload, crc):
+                    self.__logger.error(f"Corrupted frame at offset {offset} in {self.__file}, stopping")
+                    return
+
+                yield codec.decompress_frame(payload, self.__flags)
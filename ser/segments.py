@@ -0,0 +1,231 @@
+import json
+import logging
+import os
+import struct
+import zlib
+from typing import Iterator, List, Optional, Tuple
+
+from inputDevice.input_event import InputEvent
+from ser import codec
+from ser.reader import EventReader
+
+MANIFEST_SUFFIX = ".manifest"
+MANIFEST_VERSION = 1
+
+
+def manifest_path(file: str) -> str:
+    """
+    Get the path of the manifest of a segmented recording.
+    """
+    return file + MANIFEST_SUFFIX
+
+
+def segment_path(file: str, number: int) -> str:
+    """
+    Get the path of one segment of a segmented recording.
+    """
+    return f"{file}.{number:06d}"
+
+
+def _sync_directory(path: str):
+    """
+    fsync a directory, making the entries created or renamed in it durable.
+    Only POSIX systems can open a directory, elsewhere this does nothing.
+    """
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+
+    descriptor = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+class Segment:
+    """
+    Summary of one segment file, as stored in the manifest.
+
+    Attributes:
+        file (str): The segment file name, relative to the manifest directory.
+        first_timestamp (int): Timestamp of its first event, in microseconds.
+        last_timestamp (int): Timestamp of its last event, in microseconds.
+        events (int): Number of events it holds.
+        size (int): Size of the file, in bytes.
+    """
+
+    def __init__(self, file: str, first_timestamp: int, last_timestamp: int, events: int = 0, size: int = 0):
+        self.file = file
+        self.first_timestamp = first_timestamp
+        self.last_timestamp = last_timestamp
+        self.events = events
+        self.size = size
+
+    def to_dict(self) -> dict:
+        return {
+            "file": self.file,
+            "first_timestamp": self.first_timestamp,
+            "last_timestamp": self.last_timestamp,
+            "events": self.events,
+            "size": self.size,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Segment":
+        return cls(data["file"], data["first_timestamp"], data["last_timestamp"], data["events"], data["size"])
+
+
+class Manifest:
+    """
+    Small JSON file listing the segments of a recording, in order.
+
+    Every segment is a complete event log (header, frames and time index)
+    on the timeline of the whole recording, so segments can be read,
+    moved, compressed or archived independently of each other.
+    """
+
+    def __init__(self, path: str, segments: Optional[List[Segment]] = None):
+        """
+        Args:
+            path (str): The path of the manifest file.
+            segments (Optional[List[Segment]]): The segments, in timestamp order.
+        """
+        self.path = path
+        self.segments: List[Segment] = segments if segments is not None else []
+
+    def resolve(self, segment: Segment) -> str:
+        """
+        Get the path of a segment file.
+        """
+        return os.path.join(os.path.dirname(self.path), segment.file)
+
+    def save(self, sync: bool = False):
+        """
+        Write the manifest atomically, so a reader never sees a partial one.
+
+        Args:
+            sync (bool): fsync the new manifest before it replaces the old one,
+                         and its directory afterwards, so the replacement
+                         survives a crash.
+        """
+        data = {"version": MANIFEST_VERSION, "segments": [segment.to_dict() for segment in self.segments]}
+
+        temporary = self.path + ".tmp"
+        with open(temporary, "w") as file:
+            json.dump(data, file)
+            if sync:
+                file.flush()
+                os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+
+        if sync:
+            _sync_directory(os.path.dirname(os.path.abspath(self.path)))
+
+    @classmethod
+    def load(cls, path: str) -> "Manifest":
+        """
+        Read a manifest.
+
+        Raises:
+            OSError: If the file cannot be read.
+            ValueError: If the file is not a manifest this version understands.
+        """
+        with open(path, "r") as file:
+            data = json.load(file)
+
+        if data.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"Unsupported manifest version {data.get('version')}")
+
+        return cls(path, [Segment.from_dict(segment) for segment in data["segments"]])
+
+
+class SegmentedReader:
+    """
+    Reader over a segmented recording, with the same interface as
+    EventReader.
+
+    Segments are opened one at a time, only when the iteration reaches
+    them, and closed as soon as it leaves them, so memory stays constant
+    whatever the number of segments. seek() and range() skip the segments
+    outside the requested range using the manifest alone.
+    """
+
+    def __init__(self, file: str):
+        """
+        Open a segmented recording.
+
+        Args:
+            file (str): The path of the recording (not of its manifest).
+
+        Raises:
+            OSError: If the manifest cannot be read.
+            ValueError: If the manifest is invalid.
+        """
+        self.__path = manifest_path(file)
+        self.__logger = logging.getLogger("ser.SegmentedReader")
+
+        self.__stat = os.stat(self.__path)
+        self.__manifest = Manifest.load(self.__path)
+        self.__logger.info(f"Opened {len(self.__manifest.segments)} segments from {self.__path}")
+
+    def get_key(self) -> Tuple[str, int, int, int]:
+        """
+        Get what identifies this version of the recording: the path, inode,
+        size and modification time of its manifest when it was opened.
+        """
+        return os.path.abspath(self.__path), self.__stat.st_ino, self.__stat.st_size, self.__stat.st_mtime_ns
+
+    def is_stale(self) -> bool:
+        """
+        Check whether the manifest changed on disk since it was opened.
+        """
+        try:
+            stat = os.stat(self.__path)
+        except OSError:
+            return True
+
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns) != \
+            (self.__stat.st_ino, self.__stat.st_size, self.__stat.st_mtime_ns)
+
+    def close(self):
+        """
+        Nothing to release, segments are closed as soon as they are read.
+        """
+        pass
+
+    def __iter__(self) -> Iterator[InputEvent]:
+        return self.range()
+
+    def seek(self, timestamp: int) -> Iterator[InputEvent]:
+        """
+        Iterate over the events from the first one at or after a timestamp.
+        """
+        return self.range(timestamp)
+
+    def range(self, start: Optional[int] = None, end: Optional[int] = None) -> Iterator[InputEvent]:
+        """
+        Iterate over the events timestamped in [start, end), in order.
+
+        A missing segment (e.g. archived) or one that is not a columnar
+        event log is skipped with a warning, segments are never unpickled.
+        A segment that fails to decode midway is left at that point, and
+        the iteration goes on with the next one.
+        """
+        for segment in self.__manifest.segments:
+            if start is not None and segment.last_timestamp < start:
+                continue
+            if end is not None and segment.first_timestamp >= end:
+                return
+
+            try:
+                reader = EventReader(self.__manifest.resolve(segment), allow_pickle=False)
+            except (OSError, codec.FormatError, ValueError) as e:
+                self.__logger.warning(f"Skipping segment {segment.file}: {e}")
+                continue
+
+            try:
+                yield from reader.range(start, end)
+            except (codec.FormatError, ValueError, struct.error, zlib.error) as e:
+                self.__logger.warning(f"Skipping the rest of segment {segment.file}: {e}")
+            finally:
+                reader.close()
@@ -1,8 +1,17 @@
 from utils.thread.thread import Runnable
 
-import pickle
 import logging
 import os
+from enum import Enum
+from threading import Lock
+from time import monotonic, perf_counter_ns
+from typing import BinaryIO, List, Optional, Union
+
+from inputDevice.event_buffer import EventBuffer
+from metrics.metrics import get_registry
+from ser import codec
+from ser.reader import EventReader
+from ser.segments import Manifest, Segment, SegmentedReader, manifest_path, segment_path
 
 class Serialize(Runnable):
     """
@@ -10,77 +19,312 @@ class Serialize(Runnable):
 
     Inherits from Runnable to manage threading behavior.
 
+    Events are appended to an event log (see ser.codec) one frame per
+    batch, so a crash only loses the batch being written.
+
+    With a segment size or duration cap, the recording is instead written
+    as rolling segment files listed by a manifest (see ser.segments), so it
+    can grow without bound while each file stays small. Segments are rolled
+    between batches, so one can exceed its cap by at most one batch.
+
+    Batches are queued without touching the disk, and the writer thread
+    takes every batch queued while it was busy and writes them together
+    (group commit) through file handles it keeps open. The queue is
+    bounded: once max_pending batches wait, schedule_serialization refuses
+    new ones instead of blocking, and the caller retries later. Batches are
+    only accepted while the writer runs, so none is left behind once it
+    stopped.
+
+    The queue and the files have separate locks: the condition only guards
+    the queue, the write lock is held while the files are written, reset
+    or synced, and by deserialize and reader so they never see a frame or
+    a manifest being written.
+
     Attributes:
-        __list (list): A list to store mouse events for serialization.
+        __list (list): The EventBuffer batches waiting to be serialized.
         __file (str): The filename for the serialized data.
         __logger (Logger): Logger instance for logging messages.
     """
 
-    def __init__(self, file: str = "ser.pkl"):
+    class Durability(Enum):
+        """
+        When written data is forced to disk with fsync.
+
+        Attributes:
+            NONE: Never, the OS writes it back when it sees fit.
+            BATCH: After every group commit, before the next one starts.
+            INTERVAL: At most every fsync_interval_ms, and when the writer stops.
+        """
+        NONE = "none"
+        BATCH = "batch"
+        INTERVAL = "interval"
+
+    def __init__(self, file: str = "ser.pkl", segment_bytes: Optional[int] = None, segment_us: Optional[int] = None,
+                 compress: bool = False, max_pending: int = 64, durability: "Serialize.Durability" = Durability.NONE,
+                 fsync_interval_ms: int = 1000):
         """
         Initialize the Serialize class.
 
         Args:
             file (str): The filename for the serialized data. Default is "ser.pkl".
+            segment_bytes (Optional[int]): Size a segment is rolled at, None for no size cap.
+            segment_us (Optional[int]): Duration a segment is rolled at, in microseconds,
+                                        None for no duration cap.
+            compress (bool): Compress every frame (see codec.FLAG_ZLIB).
+            max_pending (int): Number of batches queued at most, see schedule_serialization.
+            durability (Serialize.Durability): When written data is fsynced.
+            fsync_interval_ms (int): Interval between two fsyncs with Durability.INTERVAL.
         """
         super().__init__()
         self.__list = []
         self.__file = file
+        self.__segment_bytes = segment_bytes
+        self.__segment_us = segment_us
+        self.__manifest: Optional[Manifest] = None
+        self.__flags = codec.FLAG_ZLIB if compress else 0
+        self.__max_pending = max(1, max_pending)
+        self.__durability = durability
+        self.__fsync_interval = fsync_interval_ms / 1000
         self.__logger = logging.getLogger("ser.Serialize")
+        self._write_lock = Lock()
+
+        # Owned by the writer thread, under the write lock
+        self.__path: Optional[str] = None
+        self.__data: Optional[BinaryIO] = None
+        self.__index: Optional[BinaryIO] = None
+        self.__dirty = False
+        self.__last_sync = monotonic()
+
+        registry = get_registry()
+        self.__pending_metric = registry.gauge("ser.pending_batches")
+        self.__rejected_metric = registry.counter("ser.rejected_batches")
+        self.__commit_metric = registry.histogram("ser.commit_batches")
+        self.__bytes_metric = registry.counter("ser.bytes_written")
+        self.__write_metric = registry.histogram("ser.write_us")
+        self.__fsync_metric = registry.histogram("ser.fsync_us")
 
-    def schedule_serialization(self, list):
+    def schedule_serialization(self, batch: EventBuffer, wait: bool = False) -> bool:
         """
-        Schedule serialization by adding each element to the internal list.
+        Schedule serialization of a batch. The buffer is queued as is and must
+        not be modified afterwards.
+
+        Never waits on the disk: the lock taken only guards the queue.
 
         Args:
-            elements: A list of events to be serialized.
-        """
-        if list:
-            with self._condition:
-                self.__list.extend(list)
-                self._condition.notify_all()
+            batch: The EventBuffer holding the events to be serialized.
+            wait: Wait for room when the queue is full instead of refusing the batch.
 
-            self.__logger.info("Serialization scheduled")
-        else:
+        Returns:
+            bool: False if the batch was not queued, because the queue was
+            full or the writer is not running.
+        """
+        if not batch:
             self.__logger.info("List is empty")
+            return True
+
+        with self._condition:
+            if wait:
+                self._condition.wait_for(
+                    lambda: len(self.__list) < self.__max_pending or self._state != Runnable.State.RUNNING)
+
+            if self._state != Runnable.State.RUNNING:
+                self.__logger.warning(f"Serializer not running, {len(batch)} events not written")
+                self.__rejected_metric.inc()
+                return False
+            if len(self.__list) >= self.__max_pending:
+                self.__rejected_metric.inc()
+                return False
+
+            self.__list.append(batch)
+            self.__pending_metric.set(len(self.__list))
+            self._condition.notify_all()
+
+        self.__logger.info("Serialization scheduled")
+        return True
 
-    def _unsafe_serialize(self, events):
+    def _unsafe_serialize(self, batches):
         """
-        Serialize the provided events to a file.
+        Append the provided batches to the file, one frame per batch.
+
+        The batches are encoded straight from their columns and written with
+        a single write call, so the cost of a flush only depends on the size
+        of the batches, not on how much was already recorded.
 
         Warning:
             This method is not thread-safe.
-            You must acquire the _condition before calling this
+            Only the serialization thread, which owns the file handles, may call
+            it, holding the write lock.
 
         Args:
-            events: The events to be serialized.
+            batches: The EventBuffers to be serialized.
         """
 
         self.__logger.debug("Attempting serialization")
 
-        existing_events = []
-        if os.path.exists(self.__file):
-            with open(self.__file, "rb") as file:
-                try:
-                    existing_events = pickle.load(file)
-                except EOFError:
-                    self.__logger.warning("The file is empty")
+        start = perf_counter_ns()
+
+        if self.__manifest is None:
+            self.__append(self.__file, b"".join(codec.encode_buffer(batch, self.__flags) for batch in batches))
+        else:
+            self.__append_segments(batches)
+
+        self.__write_metric.record((perf_counter_ns() - start) / 1_000)
+        self.__commit_metric.record(len(batches))
+
+    def __append(self, path: str, frames: bytes) -> int:
+        """
+        Append frames to an event log and their entries to its index.
+
+        Returns:
+            int: The size of the event log afterwards.
+        """
+        self.__open(path)
+
+        if self.__data.tell() == 0:
+            self.__data.write(codec.encode_header(flags=self.__flags))
+        index = codec.encode_index(frames, self.__data.tell())
+        self.__data.write(frames)
+        size = self.__data.tell()
+
+        # Written after the frames, so the index never points past the data
+        self.__index.write(index)
+        self.__dirty = True
+
+        self.__bytes_metric.inc(len(frames))
+        return size
+
+    def __open(self, path: str):
+        """
+        Make path the event log the handles append to, closing the previous one.
+
+        The handles are unbuffered, so every write reaches the OS right away
+        and readers see the frames before their index entries.
+        """
+        if path == self.__path:
+            return
+
+        self.__close()
+        self.__data = open(path, "ab", buffering=0)
+        self.__index = open(path + codec.INDEX_SUFFIX, "ab", buffering=0)
+        self.__path = path
+
+    def __close(self):
+        """
+        Close the handles, syncing them first unless durability is NONE.
+        """
+        if self.__path is None:
+            return
 
-        with open(self.__file, "wb") as file:
-            pickle.dump(existing_events + events, file)
+        self.__sync(force=True)
+        self.__data.close()
+        self.__index.close()
+        self.__path, self.__data, self.__index = None, None, None
+
+    def __sync(self, force: bool = False):
+        """
+        fsync what was written since the last sync, if the durability asks for it.
+
+        Args:
+            force (bool): Sync even if the interval did not elapse yet.
+        """
+        if not self.__dirty or self.__durability == Serialize.Durability.NONE:
+            return
+        if self.__durability == Serialize.Durability.INTERVAL and not force \
+                and monotonic() - self.__last_sync < self.__fsync_interval:
+            return
+
+        start = perf_counter_ns()
+        # The data first, so a synced index never points past synced data
+        os.fsync(self.__data.fileno())
+        os.fsync(self.__index.fileno())
+        self.__fsync_metric.record((perf_counter_ns() - start) / 1_000)
+
+        self.__dirty = False
+        self.__last_sync = monotonic()
+
+    def __sync_timeout(self) -> Optional[float]:
+        """
+        Get how long the writer may sleep before an interval sync is due.
+        """
+        if not self.__dirty or self.__durability != Serialize.Durability.INTERVAL:
+            return None
+        return max(0.0, self.__fsync_interval - (monotonic() - self.__last_sync))
+
+    def __append_segments(self, batches: List[EventBuffer]):
+        """
+        Append batches to the last segment, rolling to a new one whenever it
+        is full, then update the manifest.
+        """
+        segments = self.__manifest.segments
+
+        for batch in batches:
+            with batch.get_columns()[0] as timestamps:
+                first, last = timestamps[0], timestamps[-1]
+
+            if not segments or self.__is_full(segments[-1], last):
+                path = segment_path(self.__file, len(segments) + 1)
+                segments.append(Segment(os.path.basename(path), first, last))
+                self.__logger.info(f"Rolled to segment {path}")
+
+            segment = segments[-1]
+            segment.size = self.__append(self.__manifest.resolve(segment), codec.encode_buffer(batch, self.__flags))
+            segment.last_timestamp = last
+            segment.events += len(batch)
+
+        self.__manifest.save(sync=self.__durability != Serialize.Durability.NONE)
+
+    def __is_full(self, segment: Segment, timestamp: int) -> bool:
+        """
+        Check whether a segment reached a cap, or would with an event at timestamp.
+        """
+        if self.__segment_bytes is not None and segment.size >= self.__segment_bytes:
+            return True
+
+        return self.__segment_us is not None and timestamp - segment.first_timestamp > self.__segment_us
 
     def deserialize(self):
         """
         Deserialize events from the file.
 
+        Older files (framed pickles or a single pickled list) are still
+        accepted. A truncated or corrupted tail is skipped with a warning
+        instead of failing the whole file.
+
         Returns:
             The deserialized events.
         """
         self.__logger.debug("Attempting deserialization")
 
-        with self._condition:
+        with self._write_lock:
+            if os.path.exists(manifest_path(self.__file)):
+                return list(SegmentedReader(self.__file))
+
             with open(self.__file, 'rb') as file:
-                return pickle.load(file)
+                data = file.read()
+
+        events, ignored = codec.load(data)
+        if ignored:
+            self.__logger.warning(f"Ignoring {ignored} bytes of truncated or corrupted data at the end of the file")
+
+        return events
+
+    def reader(self) -> Union[EventReader, SegmentedReader]:
+        """
+        Open a reader over the serialized file, memory-mapped, or streaming
+        across the segments of a segmented recording.
+
+        The reader only sees what was written when it was opened, except for
+        the segments it opens later, while iterating: the last one may still
+        be written to, and may then end with a partial frame, which is
+        skipped like a truncated tail.
+
+        Returns:
+            Union[EventReader, SegmentedReader]: A reader that can be iterated any number of times.
+        """
+        with self._write_lock:
+            if os.path.exists(manifest_path(self.__file)):
+                return SegmentedReader(self.__file)
+            return EventReader(self.__file)
 
     def _run(self):
         """
@@ -90,26 +334,62 @@ class Serialize(Runnable):
         self.__logger.info("Serialization thread started")
         self.__reset()
 
-        with self._condition:
-            while self._state == Runnable.State.RUNNING:
-                if self.__list == []:
-                    self._condition.wait_for(lambda: self._state == Runnable.State.STOPPED or self.__list)
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._state == Runnable.State.STOPPED or self.__list,
+                                         timeout=self.__sync_timeout())
+                batches, self.__list = self.__list, []
+                stopping = self._state == Runnable.State.STOPPED
+                self.__pending_metric.set(0)
+                # Wakes up the callers waiting for room
+                self._condition.notify_all()
+
+            # Written without the condition, so queuing never waits on the disk
+            with self._write_lock:
+                if batches:
+                    self._unsafe_serialize(batches)
+                self.__sync()
 
-                if self.__list:
-                    self._unsafe_serialize(self.__list)
-                    self.__list.clear()
+            if stopping and not batches:
+                break
 
+        with self._write_lock:
+            self.__close()
         self.__logger.info("Serialization thread finished")
 
     def __reset(self):
         """ Reset current serialization on the file """
-        with self._condition:
+        with self._write_lock:
+            self.__close()
+
             if os.path.exists(self.__file):
                 os.remove(self.__file)
                 self.__logger.info("Serialization file removed")
             else:
                 self.__logger.info("No serialization file to remove")
 
-            self.__list = []
-            self._condition.notify_all()
+            if os.path.exists(self.__file + codec.INDEX_SUFFIX):
+                os.remove(self.__file + codec.INDEX_SUFFIX)
+
+            self.__remove_segments()
+            if self.__segment_bytes is not None or self.__segment_us is not None:
+                self.__manifest = Manifest(manifest_path(self.__file))
+
+    def __remove_segments(self):
+        """ Remove a previous segmented recording on the file, if any """
+        path = manifest_path(self.__file)
+        if not os.path.exists(path):
+            return
+
+        try:
+            manifest = Manifest.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            self.__logger.warning(f"Cannot read {path}, leaving its segments in place: {e}")
+        else:
+            for segment in manifest.segments:
+                for file in (manifest.resolve(segment), manifest.resolve(segment) + codec.INDEX_SUFFIX):
+                    if os.path.exists(file):
+                        os.remove(file)
+            self.__logger.info(f"Removed {len(manifest.segments)} segments")
 
+        os.remove(path)
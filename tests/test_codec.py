@@ -0,0 +1,146 @@
+import pickle
+
+import pytest
+
+from inputDevice.input_event import InputEvent
+from keyboard.keyboard_event import KeyboardEvent
+from mouse.mouse_event import MouseEvent
+from ser import codec
+
+
+def make_events(count: int = 10_000, step: int = 1_000):
+    """
+    Build a recording alternating mouse moves and key presses, one every
+    step microseconds.
+    """
+    events = []
+    for i in range(count):
+        if i % 3:
+            payload = MouseEvent(MouseEvent.EventType.MOVE, i, -i)
+        else:
+            payload = KeyboardEvent.from_record(KeyboardEvent.EventType.PRESSED.value, 0, 0, f"char:{chr(97 + i % 26)}")
+        events.append(InputEvent(payload, i * step))
+    return events
+
+
+def as_records(events):
+    return [(event.timestamp, event.payload.getSourceType(), event.payload.to_record()) for event in events]
+
+
+def in_milliseconds(events):
+    return [InputEvent(event.payload, event.timestamp // 1_000) for event in events]
+
+
+def encode_file(events, version: int = codec.VERSION, flags: int = 0) -> bytes:
+    """
+    Encode events as a whole file of the given format version, timestamps
+    being given in the unit of that version.
+    """
+    if version == 1:
+        frames = codec.encode_frame(pickle.dumps(events))
+    else:
+        frames = codec.encode_events(events, flags)
+    return codec.encode_header(version, flags) + frames
+
+
+def test_round_trip_version_1():
+    events = make_events()
+    loaded, ignored = codec.load(encode_file(in_milliseconds(events), version=1))
+
+    assert ignored == 0
+    assert as_records(loaded) == as_records(events)
+
+
+def test_round_trip_version_2():
+    events = make_events()
+    loaded, ignored = codec.load(encode_file(in_milliseconds(events), version=2))
+
+    assert ignored == 0
+    assert as_records(loaded) == as_records(events)
+
+
+def test_round_trip_version_3():
+    events = make_events(step=7)
+    loaded, ignored = codec.load(encode_file(events, version=3))
+
+    assert ignored == 0
+    assert as_records(loaded) == as_records(events)
+
+
+@pytest.mark.parametrize("flags", [0, codec.FLAG_ZLIB], ids=["plain", "zlib"])
+def test_round_trip_version_4(flags):
+    events = make_events(step=7)
+    data = encode_file(events, version=4, flags=flags)
+    loaded, ignored = codec.load(data)
+
+    assert codec.decode_header(data) == (4, flags)
+    assert ignored == 0
+    assert as_records(loaded) == as_records(events)
+
+
+def test_compressed_is_smaller():
+    events = make_events(step=7)
+
+    assert len(encode_file(events, flags=codec.FLAG_ZLIB)) < len(encode_file(events))
+
+
+def test_flags_need_version_4():
+    data = encode_file(make_events(100), version=3, flags=codec.FLAG_ZLIB)
+
+    with pytest.raises(codec.FormatError):
+        codec.load(data)
+
+
+def test_legacy_pickle():
+    events = make_events(100)
+    loaded, ignored = codec.load(pickle.dumps(in_milliseconds(events)))
+
+    assert ignored == 0
+    assert as_records(loaded) == as_records(events)
+
+
+def test_frames_split_on_large_deltas():
+    events = make_events(10, step=1 << 31)
+    loaded, _ = codec.load(encode_file(events))
+
+    assert as_records(loaded) == as_records(events)
+
+
+@pytest.mark.parametrize("flags", [0, codec.FLAG_ZLIB])
+def test_truncated_tail(flags):
+    events = make_events()
+    data = encode_file(events, flags=flags)
+    frames = codec.scan_frames(data)
+    last_start = frames[-1][0] - codec.FRAME.size
+
+    loaded, ignored = codec.load(data[:-5])
+
+    assert ignored == len(data) - 5 - last_start
+    assert as_records(loaded) == as_records(events[:len(loaded)])
+    assert len(loaded) == (len(frames) - 1) * codec.FRAME_EVENTS
+
+
+def test_corrupted_frame():
+    events = make_events()
+    data = bytearray(encode_file(events))
+    start, length, _ = codec.scan_frames(data)[1]
+    data[start + length // 2] ^= 0xFF
+
+    loaded, ignored = codec.load(bytes(data))
+
+    assert as_records(loaded) == as_records(events[:codec.FRAME_EVENTS])
+    assert ignored == len(data) - start + codec.FRAME.size
+
+
+def test_unknown_header():
+    with pytest.raises(codec.FormatError):
+        codec.decode_header(codec.MAGIC + b"\x03\x00\x80\x00")
+    with pytest.raises(codec.FormatError):
+        codec.load(codec.encode_header(version=99))
+
+
+def test_index_matches_frames():
+    frames = codec.encode_events(make_events())
+    data = codec.encode_header() + frames
+
+    assert codec.decode_index(codec.encode_index(frames, codec.HEADER.size)) == codec.build_index(data)
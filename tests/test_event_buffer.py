@@ -0,0 +1,42 @@
+import pytest
+
+from inputDevice.event_buffer import COORDINATE_MAX, COORDINATE_MIN, KEY_ID_MAX, EventBuffer
+
+
+def test_columns():
+    buffer = EventBuffer(1)
+    for i in range(100):
+        buffer.append(i * 10, i % 2, 1, i, -i, "char:a" if i % 2 else None)
+
+    timestamps, sources, types, x, y, keys = buffer.get_columns()
+    assert len(buffer) == 100
+    assert list(timestamps) == [i * 10 for i in range(100)]
+    assert list(x) == list(range(100))
+    assert list(y) == [-i for i in range(100)]
+    assert [buffer.get_key_table()[key] for key in keys] == ["char:a" if i % 2 else None for i in range(100)]
+    for column in (timestamps, sources, types, x, y, keys):
+        column.release()
+
+
+def test_coordinates():
+    buffer = EventBuffer(1)
+    buffer.append(0, 0, 0, 12.6, -3.2, None)
+    buffer.append(1, 0, 0, 1 << 40, -(1 << 40), None)
+    buffer.append(2, 0, 0, float("nan"), float("inf"), None)
+
+    _, _, _, x, y, _ = buffer.get_columns()
+    assert list(x) == [13, COORDINATE_MAX, 0]
+    assert list(y) == [-3, COORDINATE_MIN, 0]
+
+
+def test_key_limit():
+    buffer = EventBuffer()
+    for i in range(KEY_ID_MAX):
+        buffer.append(i, 1, 0, 0, 0, f"char:{i}")
+
+    with pytest.raises(ValueError):
+        buffer.append(KEY_ID_MAX, 1, 0, 0, 0, "char:new")
+    buffer.append(KEY_ID_MAX, 1, 0, 0, 0, "char:0")
+
+    assert len(buffer) == KEY_ID_MAX + 1
+    assert len(buffer.get_key_table()) == KEY_ID_MAX + 1
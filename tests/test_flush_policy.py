@@ -0,0 +1,39 @@
+import pytest
+
+from inputDevice.event_buffer import EventBuffer
+from inputDevice.flush_policy import FlushPolicy
+
+
+def fill(count: int) -> EventBuffer:
+    buffer = EventBuffer()
+    for i in range(count):
+        buffer.append(i, 0, 0, i, i, None)
+    return buffer
+
+
+def test_thresholds():
+    policy = FlushPolicy(max_events=10, max_bytes=100, max_latency=1)
+
+    assert not policy.is_due(EventBuffer(), 10)
+    assert not policy.is_due(fill(1), 0.5)
+    assert policy.is_due(fill(1), 1)
+    assert policy.is_due(fill(100 // EventBuffer.ROW_BYTES), 0)
+    assert policy.get_event_limit() == 100 // EventBuffer.ROW_BYTES
+
+
+def test_event_threshold():
+    policy = FlushPolicy(max_events=10, max_latency=None)
+
+    assert not policy.is_due(fill(9), 3600)
+    assert policy.is_due(fill(10), 0)
+    assert policy.get_event_limit() == 10
+
+
+def test_unset_thresholds():
+    policy = FlushPolicy(max_events=None, max_bytes=None, max_latency=None)
+
+    assert not policy.is_due(fill(1000), 3600)
+    assert policy.get_event_limit() is None
+
+    with pytest.raises(ValueError):
+        FlushPolicy(max_events=0)
@@ -0,0 +1,62 @@
+import pickle
+
+from inputDevice.input_event import InputEvent
+from keyboard.keyboard_event import KeyboardEvent
+from mouse.mouse_event import MouseEvent
+from ser import codec
+
+# Three mouse events pickled by the classes before they had __slots__,
+# i.e. with a plain __dict__ state: a move to (10, 20) at 0 ms, a left
+# press there at 5 ms and a left release at (11, 21) at 9 ms.
+LEGACY_PICKLE = (
+    b'\x80\x04\x95\x1a\x01\x00\x00\x00\x00\x00\x00]\x94(\x8c\x17inputDev'
+    b'ice.input_event\x94\x8c\nInputE'
+    b'vent\x94\x93\x94)\x81\x94}\x94(\x8c\x07payload\x94\x8c'
+    b'\x11mouse.mouse_event\x94\x8c\nMou'
+    b'seEvent\x94\x93\x94)\x81\x94}\x94(\x8c\nevent_'
+    b'type\x94h\x07\x8c\x14MouseEvent.Even'
+    b'tType\x94\x93\x94K\x00\x85\x94R\x94\x8c\x01x\x94K\n\x8c\x01y\x94'
+    b'K\x14ub\x8c\ttimestamp\x94K\x00\x8c\x02id\x94K'
+    b'\x01ubh\x03)\x81\x94}\x94(h\x06h\t)\x81\x94}\x94(h\x0ch'
+    b'\x0eK\x01\x85\x94R\x94h\x11K\nh\x12K\x14ubh\x13K\x05h\x14K'
+    b'\x02ubh\x03)\x81\x94}\x94(h\x06h\t)\x81\x94}\x94(h\x0ch'
+    b'\x0eK\x03\x85\x94R\x94h\x11K\x0bh\x12K\x15ubh\x13K\th\x14K'
+    b'\x03ube.'
+)
+
+
+def as_tuples(events):
+    return [(event.timestamp, event.id, event.payload.event_type, event.payload.x, event.payload.y) for event in events]
+
+
+def test_legacy_pickle():
+    events = pickle.loads(LEGACY_PICKLE)
+
+    assert as_tuples(events) == [
+        (0, 1, MouseEvent.EventType.MOVE, 10, 20),
+        (5, 2, MouseEvent.EventType.PRESSED_LEFT, 10, 20),
+        (9, 3, MouseEvent.EventType.RELEASED_LEFT, 11, 21),
+    ]
+    assert all(not hasattr(event, "__dict__") for event in events)
+    assert all(not hasattr(event.payload, "__dict__") for event in events)
+
+
+def test_legacy_recording():
+    # Unframed pickles are version 1 recordings, timestamped in milliseconds
+    events, ignored = codec.load(LEGACY_PICKLE)
+
+    assert ignored == 0
+    assert [event.timestamp for event in events] == [0, 5_000, 9_000]
+
+
+def test_slotted_round_trip():
+    events = [
+        InputEvent(MouseEvent(MouseEvent.EventType.MOVE, 1, 2), 10),
+        InputEvent(KeyboardEvent.from_record(KeyboardEvent.EventType.PRESSED.value, 0, 0, "char:a"), 20),
+    ]
+
+    for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+        loaded = pickle.loads(pickle.dumps(events, protocol=protocol))
+
+        assert [(event.timestamp, event.id) for event in loaded] == [(event.timestamp, event.id) for event in events]
+        assert [event.payload.to_record() for event in loaded] == [event.payload.to_record() for event in events]
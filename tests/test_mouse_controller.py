@@ -0,0 +1,90 @@
+import pytest
+
+pytest.importorskip("pynput")
+
+from pynput.mouse import Button
+
+from mouse import mouse_controller
+from mouse.mouse_event import MouseEvent
+
+
+class FakeController:
+    """ Records what a pynput mouse Controller is asked to do """
+
+    def __init__(self):
+        self.actions = []
+
+    def __setattr__(self, name, value):
+        if name == "position":
+            self.actions.append(("move", value))
+        else:
+            super().__setattr__(name, value)
+
+    def press(self, button):
+        self.actions.append(("press", button))
+
+    def release(self, button):
+        self.actions.append(("release", button))
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    fake = FakeController()
+    monkeypatch.setattr(mouse_controller, "Controller", lambda: fake)
+    return mouse_controller.MouseController(), fake
+
+
+def replay(calls):
+    for call, argument in calls:
+        call(argument)
+
+
+def test_compile_elides_moves_to_the_current_position(controller):
+    handler, fake = controller
+    calls = handler.compile([
+        MouseEvent(MouseEvent.EventType.MOVE, 10, 20),
+        MouseEvent(MouseEvent.EventType.PRESSED_LEFT, 10, 20),
+        MouseEvent(MouseEvent.EventType.RELEASED_LEFT, 10, 20),
+        MouseEvent(MouseEvent.EventType.PRESSED_RIGHT, 30, 40),
+        MouseEvent(MouseEvent.EventType.RELEASED_RIGHT, 50, 60),
+    ])
+
+    replay(calls)
+
+    assert fake.actions == [
+        ("move", (10, 20)),
+        ("press", Button.left),
+        ("release", Button.left),
+        ("move", (30, 40)),
+        ("press", Button.right),
+        ("move", (50, 60)),
+        ("release", Button.right),
+    ]
+
+
+def test_compile_moves_before_the_first_click(controller):
+    handler, fake = controller
+
+    replay(handler.compile([MouseEvent(MouseEvent.EventType.PRESSED_LEFT, 10, 20)]))
+
+    assert fake.actions == [("move", (10, 20)), ("press", Button.left)]
+
+
+def test_compile_matches_handle_event(controller):
+    handler, fake = controller
+    events = [
+        MouseEvent(MouseEvent.EventType.MOVE, 1, 2),
+        MouseEvent(MouseEvent.EventType.PRESSED_LEFT, 3, 4),
+        MouseEvent(MouseEvent.EventType.RELEASED_LEFT, 3, 4),
+    ]
+
+    replay(handler.compile(events))
+    compiled = fake.actions[:]
+    fake.actions.clear()
+    for event in events:
+        handler.handle_event(event)
+
+    # handle_event may move before every click, compile only when needed
+    assert [action for action in fake.actions if action[0] != "move"] == \
+           [action for action in compiled if action[0] != "move"]
+    assert [action for action in compiled if action[0] == "move"] == [("move", (1, 2)), ("move", (3, 4))]
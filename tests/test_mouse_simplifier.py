@@ -0,0 +1,81 @@
+from inputDevice.event_buffer import EventBuffer
+from inputDevice.input_event import InputSource
+from keyboard.keyboard_event import KeyboardEvent
+from mouse.mouse_event import MouseEvent
+from mouse.mouse_simplifier import MoveSimplifier
+
+MOUSE = InputSource.MOUSE.value
+KEYBOARD = InputSource.KEYBOARD.value
+MOVE = MouseEvent.EventType.MOVE.value
+PRESSED_LEFT = MouseEvent.EventType.PRESSED_LEFT.value
+PRESSED = KeyboardEvent.EventType.PRESSED.value
+
+
+def make_buffer(rows) -> EventBuffer:
+    buffer = EventBuffer(len(rows))
+    for row in rows:
+        buffer.append(*row)
+    return buffer
+
+
+def as_rows(buffer: EventBuffer):
+    timestamps, sources, types, x, y, keys = buffer.get_columns()
+    key_table = buffer.get_key_table()
+    return [(timestamps[i], sources[i], types[i], x[i], y[i], key_table[keys[i]]) for i in range(len(buffer))]
+
+
+def line(count: int, step_us: int = 1_000, start: int = 0):
+    return [(start + i * step_us, MOUSE, MOVE, i, 2 * i, None) for i in range(count)]
+
+
+def test_disabled_returns_the_same_buffer():
+    buffer = make_buffer(line(100))
+
+    assert MoveSimplifier().simplify(buffer) is buffer
+
+
+def test_straight_line_keeps_its_ends():
+    rows = line(100)
+
+    assert as_rows(MoveSimplifier(tolerance=0.5).simplify(make_buffer(rows))) == [rows[0], rows[-1]]
+
+
+def test_corner_is_kept():
+    rows = [(i * 1_000, MOUSE, MOVE, i, 0, None) for i in range(50)] + \
+           [((50 + i) * 1_000, MOUSE, MOVE, 49, i + 1, None) for i in range(50)]
+
+    kept = as_rows(MoveSimplifier(tolerance=0.5).simplify(make_buffer(rows)))
+
+    assert kept == [rows[0], rows[49], rows[-1]]
+
+
+def test_back_and_forth_is_kept():
+    # Collinear, but the turn back is far from the segment joining the ends
+    rows = [(0, MOUSE, MOVE, 0, 0, None), (1_000, MOUSE, MOVE, 100, 0, None), (2_000, MOUSE, MOVE, 10, 0, None)]
+
+    assert as_rows(MoveSimplifier(tolerance=1).simplify(make_buffer(rows))) == rows
+
+
+def test_max_rate():
+    rows = line(100, step_us=1_000)
+
+    kept = as_rows(MoveSimplifier(max_rate=100).simplify(make_buffer(rows)))
+
+    assert kept == rows[0:99:10] + [rows[-1]]
+
+
+def test_clicks_split_runs_and_are_kept():
+    rows = line(10) + [(10_000, MOUSE, PRESSED_LEFT, 9, 18, None)] + line(10, start=11_000)
+
+    kept = as_rows(MoveSimplifier(tolerance=0.5).simplify(make_buffer(rows)))
+
+    assert kept == [rows[0], rows[9], rows[10], rows[11], rows[-1]]
+
+
+def test_keyboard_events_are_kept_and_do_not_split_runs():
+    rows = line(10)
+    rows.insert(5, (4_500, KEYBOARD, PRESSED, 0, 0, "char:a"))
+
+    kept = as_rows(MoveSimplifier(tolerance=0.5).simplify(make_buffer(rows)))
+
+    assert kept == [rows[0], rows[5], rows[-1]]
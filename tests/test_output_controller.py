@@ -0,0 +1,104 @@
+import time
+from threading import Event
+
+import pytest
+
+from bench import synthetic
+from bench.handlers import RecordingOutputHandler
+from mouse.mouse_event import MouseEvent
+from outputDevice.output_controller import OutputController
+from pipeline.pipeline import Pipeline
+from pipeline.stages import Map
+from ser import codec
+from ser.ser import Serialize
+from utils.thread.thread import Runnable
+
+
+def write_recording(path, buffer) -> Serialize:
+    with open(path, "wb") as file:
+        file.write(codec.encode_header() + codec.encode_buffer(buffer))
+    return Serialize(str(path))
+
+
+def wait_stopped(controller: OutputController, timeout: float = 5) -> bool:
+    deadline = time.monotonic() + timeout
+    while controller._state == Runnable.State.RUNNING and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return controller._state == Runnable.State.STOPPED
+
+
+def replay_once(controller: OutputController, handler: RecordingOutputHandler, count: int):
+    done = Event()
+    handler.expect(count, done.set)
+    controller.start()
+    try:
+        assert done.wait(10)
+    finally:
+        controller.stop()
+
+
+@pytest.mark.parametrize("prefetch", [0, 64])
+def test_replay(tmp_path, prefetch):
+    buffer = synthetic.mouse_moves(2_000, 0.2)
+    handler = RecordingOutputHandler()
+    controller = OutputController([handler], write_recording(tmp_path / "events.bin", buffer), timeout=0, prefetch=prefetch)
+
+    replay_once(controller, handler, len(buffer))
+
+    _, _, _, x, y, _ = buffer.get_columns()
+    handled = [payload for _, payload in handler.get_handled()][:len(buffer)]
+    assert [(payload.x, payload.y) for payload in handled] == list(zip(x, y))
+
+
+def test_empty_recording_stops(tmp_path):
+    open(tmp_path / "events.bin", "wb").close()
+    controller = OutputController([RecordingOutputHandler()], Serialize(str(tmp_path / "events.bin")), timeout=0)
+
+    controller.start()
+    assert wait_stopped(controller)
+    controller.stop()
+
+
+def test_nothing_in_range_stops(tmp_path):
+    ser = write_recording(tmp_path / "events.bin", synthetic.mouse_moves(1_000, 0.1))
+    controller = OutputController([RecordingOutputHandler()], ser, timeout=0, start_at=10_000_000)
+
+    controller.start()
+    assert wait_stopped(controller)
+    controller.stop()
+
+
+@pytest.mark.parametrize("prefetch", [0, 64])
+def test_stream_error_stops(tmp_path, prefetch):
+    def fail(event):
+        if event.timestamp > 50_000:
+            raise ValueError("broken event")
+        return event
+
+    handler = RecordingOutputHandler()
+    controller = OutputController([handler], write_recording(tmp_path / "events.bin", synthetic.mouse_moves(1_000, 0.1)),
+                                  timeout=0, pipeline=Pipeline([Map(fail)]), prefetch=prefetch)
+
+    controller.start()
+    assert wait_stopped(controller)
+    controller.stop()
+    assert handler.get_count() <= 51
+
+
+def test_catch_up_batches_overdue_events(tmp_path):
+    # Every event is due at once, so all but the first are overdue
+    buffer = synthetic.mouse_moves(1_000_000, 0.001)
+    handler = RecordingOutputHandler()
+    batches = []
+    handler.handle_batch = lambda payloads: batches.append(len(payloads)) or [handler.handle_event(p) for p in payloads]
+    controller = OutputController([handler], write_recording(tmp_path / "events.bin", buffer), timeout=0,
+                                  catch_up=True, prefetch=0)
+    controller.update_speed(1_000_000)
+
+    replay_once(controller, handler, len(buffer))
+
+    assert batches and max(batches) > 1
+    handled = [payload for _, payload in handler.get_handled()][:len(buffer)]
+    _, _, _, x, _, _ = buffer.get_columns()
+    assert [payload.x for payload in handled] == list(x)
+    assert all(payload.event_type == MouseEvent.EventType.MOVE for payload in handled)
@@ -0,0 +1,121 @@
+import threading
+
+import pytest
+
+from inputDevice.input_event import InputEvent
+from mouse.mouse_event import MouseEvent
+from pipeline.pipeline import Buffered, Pipeline, PipelineSink
+from pipeline.stages import Filter, Map, Prefetch, Split, TimeScale
+
+
+def make_events(count: int = 100, step: int = 1_000):
+    return [InputEvent(MouseEvent(MouseEvent.EventType.MOVE, i, i), i * step) for i in range(count)]
+
+
+class ListSink:
+    """ Stands for a Serialize at the end of a PipelineSink """
+
+    def __init__(self):
+        self.batches = []
+        self.started = False
+        self.stopped = False
+
+    def start(self):
+        self.started = True
+
+    def stop(self):
+        self.stopped = True
+
+    def schedule_serialization(self, batch, wait: bool = False) -> bool:
+        self.batches.append(batch)
+        return True
+
+
+def test_stages_are_chained():
+    seen = []
+    pipeline = Pipeline([Filter(lambda i: i % 2 == 0), Map(lambda i: i * 10), Split(seen.append)])
+
+    assert list(pipeline.run(range(10))) == [0, 20, 40, 60, 80]
+    assert seen == [0, 20, 40, 60, 80]
+
+
+def test_time_scale():
+    events = make_events()
+    scaled = list(TimeScale(2).process(iter(events)))
+
+    assert [event.timestamp for event in scaled] == [i * 500 for i in range(len(events))]
+    assert [event.payload for event in scaled] == [event.payload for event in events]
+    assert [event.id for event in scaled] == [event.id for event in events]
+
+
+def test_time_scale_leaves_events_untouched():
+    events = make_events()
+    list(TimeScale(4).process(iter(events)))
+
+    assert [event.timestamp for event in events] == [i * 1_000 for i in range(len(events))]
+
+
+def test_time_scale_rejects_non_positive_factor():
+    with pytest.raises(ValueError):
+        TimeScale(0)
+
+
+@pytest.mark.parametrize("stage", [Buffered(4), Prefetch(window=16, windows=2)], ids=["buffered", "prefetch"])
+def test_buffered_keeps_order(stage):
+    assert list(Pipeline([stage]).run(range(1_000))) == list(range(1_000))
+
+
+@pytest.mark.parametrize("stage", [Buffered(4), Prefetch(window=16, windows=2)], ids=["buffered", "prefetch"])
+def test_buffered_forwards_errors(stage):
+    def fail(i):
+        if i == 500:
+            raise ValueError("broken item")
+        return i
+
+    items = []
+    with pytest.raises(ValueError):
+        for item in Pipeline([Map(fail), stage]).run(range(1_000)):
+            items.append(item)
+
+    # Prefetch drops the window it was filling when the error came up
+    assert items == list(range(len(items)))
+    assert len(items) <= 500
+
+
+def test_buffered_stops_producer_when_closed():
+    closed = threading.Event()
+
+    def source():
+        try:
+            yield from range(1_000_000)
+        finally:
+            closed.set()
+
+    stream = Pipeline([Buffered(4)]).run(source())
+    assert next(stream) == 0
+    stream.close()
+
+    assert closed.wait(5)
+
+
+def test_pipeline_sink():
+    sink = ListSink()
+    pipeline_sink = PipelineSink(Pipeline([Map(lambda batch: batch * 2)]), sink)
+
+    pipeline_sink.start()
+    for i in range(1, 11):
+        assert pipeline_sink.schedule_serialization([i], wait=True)
+    pipeline_sink.stop()
+
+    assert sink.started and sink.stopped
+    assert sink.batches == [[i, i] for i in range(1, 11)]
+
+
+def test_pipeline_sink_refuses_when_full():
+    pipeline_sink = PipelineSink(Pipeline([]), ListSink(), queue_size=2)
+
+    # Not started, so nothing drains the queue
+    assert pipeline_sink.schedule_serialization([1])
+    assert pipeline_sink.schedule_serialization([2])
+    assert not pipeline_sink.schedule_serialization([3])
+    assert pipeline_sink.schedule_serialization([])
@@ -0,0 +1,70 @@
+import os
+from contextlib import closing
+
+import pytest
+
+from ser import codec
+from ser.reader import EventReader
+from tests.test_codec import as_records, encode_file, make_events
+
+
+def write_recording(path, events, flags: int = 0, index: bool = True) -> str:
+    data = encode_file(events, flags=flags)
+    with open(path, "wb") as file:
+        file.write(data)
+
+    if index:
+        with open(str(path) + codec.INDEX_SUFFIX, "wb") as file:
+            file.write(codec.encode_index(data[codec.HEADER.size:], codec.HEADER.size))
+    return str(path)
+
+
+@pytest.fixture(params=[0, codec.FLAG_ZLIB], ids=["plain", "zlib"])
+def recording(request, tmp_path):
+    events = make_events(step=10)
+    reader = EventReader(write_recording(tmp_path / "events.bin", events, request.param))
+    yield reader, events
+    reader.close()
+
+
+def test_iterate(recording):
+    reader, events = recording
+
+    assert as_records(reader) == as_records(events)
+    # Readers can be iterated again
+    assert len(list(reader)) == len(events)
+
+
+@pytest.mark.parametrize("timestamp", [0, 5, 10, 40_955, 40_960, 40_965, 99_990, 1_000_000])
+def test_seek(recording, timestamp):
+    reader, events = recording
+
+    assert as_records(reader.seek(timestamp)) == as_records([e for e in events if e.timestamp >= timestamp])
+
+
+@pytest.mark.parametrize("start, end", [(None, 100), (1_000, 50_000), (40_960, 40_970), (50_000, 50_000), (90_000, None)])
+def test_range(recording, start, end):
+    reader, events = recording
+    expected = [e for e in events if (start is None or e.timestamp >= start) and (end is None or e.timestamp < end)]
+
+    assert as_records(reader.range(start, end)) == as_records(expected)
+
+
+def test_missing_index(tmp_path):
+    events = make_events(step=10)
+    with closing(EventReader(write_recording(tmp_path / "events.bin", events, index=False))) as reader:
+        assert as_records(reader.seek(50_000)) == as_records([e for e in events if e.timestamp >= 50_000])
+
+
+def test_truncated_tail(tmp_path):
+    events = make_events(step=10)
+    path = write_recording(tmp_path / "events.bin", events)
+    with open(path, "r+b") as file:
+        file.truncate(os.path.getsize(path) - 5)
+
+    with closing(EventReader(path)) as reader:
+        loaded = list(reader)
+
+    assert len(loaded) == (len(events) // codec.FRAME_EVENTS) * codec.FRAME_EVENTS
+    assert as_records(loaded) == as_records(events[:len(loaded)])
+
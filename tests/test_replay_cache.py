@@ -0,0 +1,68 @@
+from itertools import islice
+
+from outputDevice.replay_cache import ReplayCache
+
+
+def make_steps(count: int):
+    return [(i, None, print, i) for i in range(count)]
+
+
+def test_disabled_by_default():
+    cache = ReplayCache()
+    steps = make_steps(10)
+
+    assert list(cache.record("key", steps)) == steps
+    assert cache.get("key") is None
+
+
+def test_caches_consumed_steps():
+    cache = ReplayCache(max_events=100)
+    steps = make_steps(10)
+
+    assert list(cache.record("key", iter(steps))) == steps
+    assert cache.get("key") == steps
+    assert cache.get("other") is None
+
+
+def test_changed_key_misses():
+    cache = ReplayCache(max_events=100)
+    list(cache.record(("file", 1, 100, 1), make_steps(10)))
+
+    assert cache.get(("file", 1, 100, 2)) is None
+
+
+def test_partial_iteration_caches_nothing():
+    cache = ReplayCache(max_events=100)
+    closed = []
+
+    def source():
+        try:
+            yield from make_steps(10)
+        finally:
+            closed.append(True)
+
+    recording = cache.record("key", source())
+    assert len(list(islice(recording, 5))) == 5
+    recording.close()
+
+    assert cache.get("key") is None
+    assert closed == [True]
+
+
+def test_long_script_is_not_cached():
+    cache = ReplayCache(max_events=5)
+    steps = make_steps(10)
+
+    assert list(cache.record("key", steps)) == steps
+    assert cache.get("key") is None
+
+
+def test_recording_replaces_the_previous_script():
+    cache = ReplayCache(max_events=100)
+    list(cache.record("first", make_steps(10)))
+
+    recording = cache.record("second", make_steps(10))
+    next(recording)
+
+    assert cache.get("first") is None
+    recording.close()
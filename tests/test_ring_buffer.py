@@ -0,0 +1,36 @@
+from inputDevice.event_buffer import COORDINATE_MAX
+from inputDevice.ring_buffer import RingBuffer
+
+
+def test_overflow():
+    ring = RingBuffer(5)
+    assert ring.get_capacity() == 8
+
+    pushed = [ring.push(i, 0, 0, i, i, None) for i in range(11)]
+
+    assert pushed == [True] * 8 + [False] * 3
+    assert ring.get_dropped() == 3
+    assert [row[0] for row in ring.drain()] == list(range(8))
+
+    assert ring.push(11, 0, 0, 0, 0, "char:a")
+    assert len(ring) == 1
+    assert ring.drain() == [(11, 0, 0, 0, 0, "char:a")]
+    assert ring.get_dropped() == 3
+
+
+def test_wraps_around():
+    ring = RingBuffer(4)
+    for start in range(0, 40, 3):
+        for i in range(start, start + 3):
+            assert ring.push(i, 0, 0, i, i, None)
+        assert [row[0] for row in ring.drain()] == list(range(start, start + 3))
+
+    assert ring.get_dropped() == 0
+
+
+def test_coordinates():
+    ring = RingBuffer(4)
+    ring.push(0, 0, 0, 1.6, float("nan"), None)
+    ring.push(1, 0, 0, 1 << 40, 2, None)
+
+    assert [row[3:5] for row in ring.drain()] == [(2, 0), (COORDINATE_MAX, 2)]
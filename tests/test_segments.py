@@ -0,0 +1,151 @@
+import os
+import pickle
+
+import pytest
+
+from bench import synthetic
+from inputDevice.event_buffer import EventBuffer
+from ser import codec
+from ser.segments import Manifest, Segment, SegmentedReader, manifest_path
+from ser.ser import Serialize
+
+
+def record(path, batches, **kwargs) -> Serialize:
+    ser = Serialize(str(path), **kwargs)
+    ser.start()
+    for batch in batches:
+        assert ser.schedule_serialization(batch, wait=True)
+    ser.stop()
+    return ser
+
+
+def split(buffer: EventBuffer, size: int):
+    timestamps, sources, event_types, x, y, _ = buffer.get_columns()
+    batches = []
+    for start in range(0, len(buffer), size):
+        batch = EventBuffer(size)
+        for i in range(start, min(start + size, len(buffer))):
+            batch.append(timestamps[i], sources[i], event_types[i], x[i], y[i], None)
+        batches.append(batch)
+    return batches
+
+
+def columns(events):
+    return [(event.timestamp, event.payload.x, event.payload.y) for event in events]
+
+
+def buffer_columns(batches):
+    rows = []
+    for batch in batches:
+        timestamps, _, _, x, y, _ = batch.get_columns()
+        rows.extend(zip(timestamps, x, y))
+    return rows
+
+
+@pytest.fixture
+def segmented(tmp_path):
+    batches = split(synthetic.mouse_moves(1_000, 2), 100)
+    path = tmp_path / "events.bin"
+    record(path, batches, segment_bytes=2_000)
+    return str(path), batches
+
+
+def test_manifest_round_trip(tmp_path):
+    manifest = Manifest(str(tmp_path / "events.bin.manifest"), [Segment("a", 0, 10, 3, 100), Segment("b", 10, 20, 4, 200)])
+    manifest.save()
+
+    loaded = Manifest.load(manifest.path)
+    assert [segment.to_dict() for segment in loaded.segments] == [segment.to_dict() for segment in manifest.segments]
+    assert loaded.resolve(loaded.segments[0]) == str(tmp_path / "a")
+    assert not os.path.exists(manifest.path + ".tmp")
+
+
+def test_manifest_unknown_version(tmp_path):
+    path = tmp_path / "events.bin.manifest"
+    path.write_text('{"version": 99, "segments": []}')
+
+    with pytest.raises(ValueError):
+        Manifest.load(str(path))
+
+
+def test_segments_are_rolled(segmented):
+    path, batches = segmented
+    manifest = Manifest.load(manifest_path(path))
+
+    assert len(manifest.segments) > 1
+    assert sum(segment.events for segment in manifest.segments) == sum(len(batch) for batch in batches)
+    for previous, segment in zip(manifest.segments, manifest.segments[1:]):
+        assert previous.last_timestamp <= segment.first_timestamp
+
+
+def test_iterate(segmented):
+    path, batches = segmented
+    reader = SegmentedReader(path)
+
+    assert columns(reader) == buffer_columns(batches)
+    assert columns(reader) == buffer_columns(batches)
+
+
+@pytest.mark.parametrize("start, end", [(None, 500_000), (500_000, None), (700_000, 1_300_000), (5_000_000, None)])
+def test_range(segmented, start, end):
+    path, batches = segmented
+    expected = [row for row in buffer_columns(batches)
+                if (start is None or row[0] >= start) and (end is None or row[0] < end)]
+
+    assert columns(SegmentedReader(path).range(start, end)) == expected
+
+
+def test_missing_segment_is_skipped(segmented):
+    path, batches = segmented
+    manifest = Manifest.load(manifest_path(path))
+    removed = manifest.segments[1]
+    os.remove(manifest.resolve(removed))
+
+    expected = [row for row in buffer_columns(batches)
+                if not removed.first_timestamp <= row[0] <= removed.last_timestamp]
+    assert columns(SegmentedReader(path)) == expected
+
+
+class Trap:
+    loaded = False
+
+    def __reduce__(self):
+        return Trap.spring, ()
+
+    @staticmethod
+    def spring():
+        Trap.loaded = True
+        return []
+
+
+@pytest.mark.parametrize("data", [
+    pickle.dumps(Trap()),
+    codec.encode_header(2) + codec.encode_frame(pickle.dumps(Trap())),
+    b"not an event log",
+], ids=["pickle", "version 2", "garbage"])
+def test_non_columnar_segment_is_skipped(segmented, data):
+    path, batches = segmented
+    manifest = Manifest.load(manifest_path(path))
+    replaced = manifest.segments[0]
+    with open(manifest.resolve(replaced), "wb") as file:
+        file.write(data)
+
+    events = columns(SegmentedReader(path))
+
+    assert not Trap.loaded
+    assert events == [row for row in buffer_columns(batches) if row[0] > replaced.last_timestamp]
+
+
+def test_corrupted_segment_is_left(segmented):
+    path, batches = segmented
+    manifest = Manifest.load(manifest_path(path))
+    broken = manifest.segments[0]
+    with open(manifest.resolve(broken), "r+b") as file:
+        # A frame whose checksum matches but which does not decode
+        payload = b"\xff" * 16
+        file.seek(codec.HEADER.size)
+        file.write(codec.encode_frame(payload))
+        file.truncate()
+    os.remove(manifest.resolve(broken) + codec.INDEX_SUFFIX)
+
+    assert columns(SegmentedReader(path)) == [row for row in buffer_columns(batches) if row[0] > broken.last_timestamp]
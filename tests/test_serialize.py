@@ -0,0 +1,211 @@
+import os
+from threading import Event
+from time import monotonic, sleep
+
+import pytest
+
+from bench import synthetic
+from ser import codec
+from ser.segments import manifest_path
+from ser.ser import Serialize
+
+
+def columns(events):
+    return [(event.timestamp, event.payload.x, event.payload.y) for event in events]
+
+
+def buffer_columns(batches):
+    rows = []
+    for batch in batches:
+        timestamps, _, _, x, y, _ = batch.get_columns()
+        rows.extend(zip(timestamps, x, y))
+    return rows
+
+
+def make_batches(count: int = 5):
+    return [synthetic.mouse_moves(1_000, 0.1) for _ in range(count)]
+
+
+def wait_until(predicate, timeout: float = 5) -> bool:
+    deadline = monotonic() + timeout
+    while not predicate():
+        if monotonic() > deadline:
+            return False
+        sleep(0.001)
+    return True
+
+
+class BlockedSerialize(Serialize):
+    """ Serialize whose first write waits until released """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.writing = Event()
+        self.release = Event()
+        self.commits = []
+
+    def _unsafe_serialize(self, batches):
+        self.commits.append(len(batches))
+        self.writing.set()
+        self.release.wait(5)
+        super()._unsafe_serialize(batches)
+
+
+@pytest.fixture
+def fsyncs(monkeypatch):
+    calls = []
+    fsync = os.fsync
+
+    def record(descriptor):
+        calls.append(descriptor)
+        fsync(descriptor)
+
+    monkeypatch.setattr(os, "fsync", record)
+    return calls
+
+
+def test_round_trip(tmp_path):
+    batches = make_batches()
+    ser = Serialize(str(tmp_path / "events.bin"))
+
+    ser.start()
+    for batch in batches:
+        assert ser.schedule_serialization(batch, wait=True)
+    ser.stop()
+
+    reader = ser.reader()
+    try:
+        assert len(list(reader)) == sum(len(batch) for batch in batches)
+    finally:
+        reader.close()
+
+
+@pytest.mark.parametrize("compress", [False, True], ids=["plain", "zlib"])
+def test_frames_keep_their_timestamps(tmp_path, compress):
+    # Batches are appended as they come, timestamps are not rebased
+    batches = make_batches(2)
+    ser = Serialize(str(tmp_path / "events.bin"), compress=compress)
+
+    ser.start()
+    for batch in batches:
+        ser.schedule_serialization(batch, wait=True)
+    ser.stop()
+
+    with open(tmp_path / "events.bin", "rb") as file:
+        data = file.read()
+    assert codec.decode_header(data) == (codec.VERSION, codec.FLAG_ZLIB if compress else 0)
+    assert columns(codec.load(data)[0]) == buffer_columns(batches)
+
+
+def test_group_commit(tmp_path):
+    batches = make_batches(6)
+    ser = BlockedSerialize(str(tmp_path / "events.bin"))
+
+    ser.start()
+    try:
+        assert ser.schedule_serialization(batches[0])
+        assert ser.writing.wait(5)
+        # Queued while the first batch is being written, committed together
+        for batch in batches[1:]:
+            assert ser.schedule_serialization(batch)
+    finally:
+        ser.release.set()
+        ser.stop()
+
+    assert ser.commits == [1, 5]
+    assert columns(codec.load(open(tmp_path / "events.bin", "rb").read())[0]) == buffer_columns(batches)
+
+
+def test_refuses_when_full(tmp_path):
+    batches = make_batches(4)
+    ser = BlockedSerialize(str(tmp_path / "events.bin"), max_pending=2)
+
+    ser.start()
+    try:
+        assert ser.schedule_serialization(batches[0])
+        assert ser.writing.wait(5)
+        assert ser.schedule_serialization(batches[1])
+        assert ser.schedule_serialization(batches[2])
+        assert not ser.schedule_serialization(batches[3])
+    finally:
+        ser.release.set()
+        ser.stop()
+
+    assert ser.commits == [1, 2]
+
+
+def test_refuses_when_stopped(tmp_path):
+    ser = Serialize(str(tmp_path / "events.bin"))
+
+    assert not ser.schedule_serialization(make_batches(1)[0])
+    assert not ser.schedule_serialization(make_batches(1)[0], wait=True)
+
+
+def test_durability_none(tmp_path, fsyncs):
+    ser = Serialize(str(tmp_path / "events.bin"), durability=Serialize.Durability.NONE)
+
+    ser.start()
+    for batch in make_batches():
+        ser.schedule_serialization(batch, wait=True)
+    ser.stop()
+
+    assert fsyncs == []
+
+
+def test_durability_batch(tmp_path, fsyncs):
+    ser = BlockedSerialize(str(tmp_path / "events.bin"), durability=Serialize.Durability.BATCH)
+    ser.release.set()
+
+    ser.start()
+    for batch in make_batches():
+        ser.schedule_serialization(batch, wait=True)
+    ser.stop()
+
+    # The data and the index, once per commit
+    assert len(fsyncs) == 2 * len(ser.commits)
+
+
+def test_durability_interval(tmp_path, fsyncs):
+    ser = BlockedSerialize(str(tmp_path / "events.bin"), durability=Serialize.Durability.INTERVAL,
+                           fsync_interval_ms=60_000)
+    ser.release.set()
+
+    ser.start()
+    try:
+        for i, batch in enumerate(make_batches()):
+            ser.schedule_serialization(batch, wait=True)
+            assert wait_until(lambda: len(ser.commits) > i)
+    finally:
+        ser.stop()
+
+    # Only when closing, the interval never elapsed
+    assert len(ser.commits) == 5
+    assert len(fsyncs) == 2
+
+
+def test_durability_interval_elapses(tmp_path, fsyncs):
+    ser = Serialize(str(tmp_path / "events.bin"), durability=Serialize.Durability.INTERVAL, fsync_interval_ms=10)
+
+    ser.start()
+    ser.schedule_serialization(make_batches(1)[0], wait=True)
+    # Synced by the writer waking up on its own, before any stop
+    synced = wait_until(lambda: len(fsyncs) == 2)
+    ser.stop()
+
+    assert synced
+
+
+@pytest.mark.parametrize("durability, synced", [(Serialize.Durability.NONE, False), (Serialize.Durability.BATCH, True)])
+def test_manifest_durability(tmp_path, fsyncs, durability, synced):
+    ser = BlockedSerialize(str(tmp_path / "events.bin"), segment_bytes=2_000, durability=durability)
+    ser.release.set()
+
+    ser.start()
+    for batch in make_batches():
+        ser.schedule_serialization(batch, wait=True)
+    ser.stop()
+
+    assert os.path.exists(manifest_path(str(tmp_path / "events.bin")))
+    # Segment data and index, plus the manifest and its directory per commit
+    segment_fsyncs = 2 * len(ser.commits) + 2 * (len(ser.commits) if synced else 0)
+    assert (len(fsyncs) >= segment_fsyncs) if synced else fsyncs == []
@@ -1,15 +1,38 @@
-import threading
+import itertools
 
 class AtomicCounter:
+    """
+    Thread-safe, lock-free counter.
+
+    next() on an itertools.count runs in C without releasing the GIL, so
+    concurrent callers each get a distinct value without contending for a
+    lock. The counter only counts up one at a time, the values handed out
+    by an increment cannot be reserved in blocks.
+    """
+
     def __init__(self, initial: int = 0):
+        self._count = itertools.count(initial + 1)
         self._value = initial
-        self._lock = threading.Lock()
 
-    def increment(self, delta: int = 1) -> int:
-        with self._lock:
-            self._value += delta
-            return self._value
+    def increment(self) -> int:
+        """
+        Add one to the counter.
+
+        Returns:
+            int: The value of the counter after the increment, never
+            returned to any other caller.
+        """
+        value = next(self._count)
+        self._value = value
+        return value
 
     def get(self) -> int:
-        with self._lock:
-            return self._value
\ No newline at end of file
+        """
+        Get the last value handed out by increment, without incrementing
+        the counter.
+
+        Concurrent increments publish their value in no particular order,
+        so until the next increment this may trail the highest value
+        handed out so far.
+        """
+        return self._value
@@ -0,0 +1,28 @@
+from time import perf_counter_ns
+
+class Clock:
+    """
+    Monotonic, high-resolution timeline shared by recording and replay.
+
+    Built on time.perf_counter_ns, so it is not affected by wall-clock
+    adjustments (NTP, DST, manual changes). Times are integer microseconds
+    elapsed since the last restart.
+    """
+
+    def __init__(self):
+        self.__base: int = perf_counter_ns()
+
+    def restart(self) -> None:
+        """
+        Set the origin of the timeline to now.
+        """
+        self.__base = perf_counter_ns()
+
+    def elapsed_us(self) -> int:
+        """
+        Get the time elapsed since the origin of the timeline.
+
+        Returns:
+            int: The elapsed time in microseconds.
+        """
+        return (perf_counter_ns() - self.__base) // 1_000